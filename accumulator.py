@@ -0,0 +1,205 @@
+import math
+
+import numpy as np
+
+
+class RunningMoments:
+    """
+    Running mean and variance of one value per generation (Welford), without keeping the values.
+    Families are added in batches, two accumulators are merged with the formula of Chan et al.,
+    so the order in which chunks are added does not matter.
+    """
+
+    def __init__(self, size):
+        """
+        :param size: number of values per family, e.g. maxGeneration + 1 (integer)
+        """
+        self.count = 0
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)  # sum of the squared deviations from the mean
+
+    def addBatch(self, values):
+        """
+        :param values: one row per family (2D numpy array)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        mean = values.mean(axis=0)
+        self.mergeMoments(len(values), mean, ((values - mean) ** 2).sum(axis=0))
+
+    def merge(self, other):
+        """
+        :param other: moments of further families (RunningMoments)
+        """
+        self.mergeMoments(other.count, other.mean, other.m2)
+
+    def mergeMoments(self, count, mean, m2):
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+
+    def variance(self):
+        """
+        :return: sample variance per generation, 0 for less than two families (numpy array)
+        """
+        if self.count < 2:
+            return np.zeros(len(self.mean))
+        return self.m2 / (self.count - 1)
+
+    def standardDeviation(self):
+        return np.sqrt(self.variance())
+
+
+class QuantileSketch:
+    """
+    Mergeable sketch of the distribution of one value per generation: the positive values are counted in buckets
+    with logarithmic bounds (gamma^(i-1), gamma^i], zeros separately. Every quantile is within relativeAccuracy of
+    a true value, the memory does not depend on the number of families and two sketches are merged by adding
+    the counts.
+    """
+
+    def __init__(self, size, relativeAccuracy=0.01, numberOfBuckets=1024):
+        """
+        :param size: number of values per family, e.g. maxGeneration + 1 (integer)
+        :param relativeAccuracy: relative error of the quantiles (float)
+        :param numberOfBuckets: number of buckets, larger values are counted in the last bucket (integer)
+        """
+        self.relativeAccuracy = relativeAccuracy
+        self.gamma = (1 + relativeAccuracy) / (1 - relativeAccuracy)
+        self.logGamma = math.log(self.gamma)
+        self.zeroCounts = np.zeros(size, dtype=np.int64)
+        self.counts = np.zeros((size, numberOfBuckets), dtype=np.int64)
+
+    def addBatch(self, values):
+        """
+        :param values: one row per family, not negative (2D numpy array)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        size, numberOfBuckets = self.counts.shape
+        positive = values > 0
+        self.zeroCounts += (~positive).sum(axis=0)
+        buckets = np.clip(np.ceil(np.log(values[positive]) / self.logGamma).astype(np.int64), 0, numberOfBuckets - 1)
+        columns = np.nonzero(positive)[1]
+        self.counts += np.bincount(columns * numberOfBuckets + buckets,
+                                   minlength=size * numberOfBuckets).reshape(size, numberOfBuckets)
+
+    def merge(self, other):
+        """
+        :param other: sketch of further families with the same accuracy (QuantileSketch)
+        """
+        if other.counts.shape != self.counts.shape or other.relativeAccuracy != self.relativeAccuracy:
+            raise ValueError("Error: Only sketches with the same size and accuracy can be merged")
+        self.zeroCounts += other.zeroCounts
+        self.counts += other.counts
+
+    def quantile(self, q):
+        """
+        :param q: probability, e.g. 0.5 for the median (float)
+        :return: quantile per generation, nan without families (numpy array)
+        """
+        total = self.zeroCounts + self.counts.sum(axis=1)
+        rank = q * (total - 1)
+        cumulative = self.zeroCounts[:, None] + np.cumsum(self.counts, axis=1)
+        # first bucket that contains the value of the rank
+        buckets = np.minimum((cumulative <= rank[:, None]).sum(axis=1), self.counts.shape[1] - 1)
+        values = 2 * self.gamma ** buckets / (self.gamma + 1)
+        values[self.zeroCounts > rank] = 0.0
+        values[total == 0] = np.nan
+        return values
+
+
+class GenerationAccumulator:
+    """
+    Folds the outcomes of the families into running statistics per generation: mean, standard deviation and
+    quantiles of the number of persons and of adult males, and the number of families that died out per generation.
+    Accumulators of chunks or worker processes are merged with merge(), so the curves are available at any time
+    of a run without keeping the lists of the families.
+    """
+
+    # quantiles in the summary
+    quantiles = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+    def __init__(self, maxGeneration, relativeAccuracy=0.01):
+        """
+        :param maxGeneration: number of simulated generations (integer)
+        :param relativeAccuracy: relative error of the quantiles (float)
+        """
+        size = maxGeneration + 1
+        self.maxGeneration = maxGeneration
+        self.numberOfFamilies = 0
+        self.persons = RunningMoments(size)
+        self.adultMales = RunningMoments(size)
+        self.personSketch = QuantileSketch(size, relativeAccuracy)
+        self.adultMaleSketch = QuantileSketch(size, relativeAccuracy)
+        # number of families per generation in which they died out
+        self.extinctCounts = np.zeros(size, dtype=np.int64)
+
+    @property
+    def numberOfFamiliesWithStatistics(self):
+        return self.persons.count
+
+    def add(self, familyResults):
+        """
+        :param familyResults: outcomes of further families (list of FamilyResult)
+        """
+        self.addGenerationLists(familyResults)
+        self.addExtinctGenerations(familyResults)
+
+    def addGenerationLists(self, familyResults):
+        """
+        Adds only the lists per generation, families without statistics are skipped.
+        :param familyResults: outcomes of further families (list of FamilyResult)
+        """
+        withStatistics = [familyResult for familyResult in familyResults
+                          if familyResult.numberPerGenerationList is not None]
+        if not withStatistics:
+            return
+        persons = np.array([familyResult.numberPerGenerationList for familyResult in withStatistics])
+        adultMales = np.array([familyResult.maleAduldNumberPerGenerationList for familyResult in withStatistics])
+        self.persons.addBatch(persons)
+        self.personSketch.addBatch(persons)
+        self.adultMales.addBatch(adultMales)
+        self.adultMaleSketch.addBatch(adultMales)
+
+    def addExtinctGenerations(self, familyResults):
+        """
+        Counts the families and the generations in which they died out.
+        :param familyResults: outcomes of further families (list of FamilyResult)
+        """
+        self.numberOfFamilies = self.numberOfFamilies + len(familyResults)
+        extinct = [familyResult.extinctGeneration for familyResult in familyResults
+                   if familyResult.extinctGeneration != ""]
+        self.extinctCounts += np.bincount(np.array(extinct, dtype=np.int64), minlength=self.maxGeneration + 1)
+
+    def merge(self, other):
+        """
+        :param other: statistics of further families (GenerationAccumulator)
+        """
+        self.numberOfFamilies = self.numberOfFamilies + other.numberOfFamilies
+        self.persons.merge(other.persons)
+        self.adultMales.merge(other.adultMales)
+        self.personSketch.merge(other.personSketch)
+        self.adultMaleSketch.merge(other.adultMaleSketch)
+        self.extinctCounts += other.extinctCounts
+
+    def summary(self):
+        """
+        :return: statistics per generation, generation 0 to maxGeneration (dictionary)
+        """
+        def curves(moments, sketch):
+            return {"mean": moments.mean.tolist(), "standardDeviation": moments.standardDeviation().tolist(),
+                    "quantiles": {str(q): sketch.quantile(q).tolist() for q in self.quantiles}}
+
+        return {"numberOfFamilies": self.numberOfFamilies,
+                "numberOfFamiliesWithStatistics": self.numberOfFamiliesWithStatistics,
+                "persons": curves(self.persons, self.personSketch),
+                "adultMales": curves(self.adultMales, self.adultMaleSketch),
+                "extinctCounts": self.extinctCounts.tolist(),
+                "extinctShare": (self.extinctCounts / max(self.numberOfFamilies, 1)).tolist()}
@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+
+from family import SimulationResult
+from output import determineGen3List
+from runner import runFamilies
+
+logger = logging.getLogger(__name__)
+
+
+def wilsonHalfWidth(count, total, z):
+    """
+    Half width of the Wilson score interval of a proportion, also usable for proportions close to 0 or 1.
+    :param count: number of hits (integer or numpy array)
+    :param total: number of trials (integer)
+    :param z: quantile of the normal distribution for the confidence level (float)
+    :return: half width of the confidence interval (float or numpy array)
+    """
+    if total == 0:
+        return np.ones_like(np.asarray(count, dtype=float))
+    proportion = np.asarray(count, dtype=float) / total
+    return z * np.sqrt(proportion * (1 - proportion) / total + z * z / (4 * total * total)) / (1 + z * z / total)
+
+
+class ConvergenceMonitor:
+    """
+    Counts the histograms of gen1, gen2 and gen3 and the extinctions while the families are added,
+    and passes each family on to the result. Can be used as result in runFamilies.
+    """
+
+    histograms = ["gen1", "gen2", "gen3"]
+
+    def __init__(self, result, confidence=0.95):
+        """
+        :param result: receives the outcome of each family (SimulationResult or ResultWriter)
+        :param confidence: confidence level of the intervals (float)
+        """
+        self.result = result
+        self.confidence = confidence
+        # scipy is only needed for the quantile, not when the module is imported
+        from scipy.stats import norm
+
+        self.z = float(norm.ppf(0.5 + confidence / 2))
+        self.numberOfFamilies = 0
+        self.numberOfExtinctFamilies = 0
+        self.counts = {name: {} for name in self.histograms}
+        # "precision", "time" or "budget" once the run is finished
+        self.stopReason = ""
+
+    def add(self, familyResult):
+        """
+        :param familyResult: outcome of the next family (FamilyResult)
+        """
+        self.result.add(familyResult)
+        self.numberOfFamilies = self.numberOfFamilies + 1
+        if familyResult.extinctGeneration != "":
+            self.numberOfExtinctFamilies = self.numberOfExtinctFamilies + 1
+        if familyResult.gen1 != "":
+            # gen3 as in the gen3list CSV file
+            values = {"gen1": familyResult.gen1, "gen2": familyResult.gen2,
+                      "gen3": determineGen3List([familyResult.gen1], [familyResult.gen2])[0]}
+            for name, value in values.items():
+                self.counts[name][value] = self.counts[name].get(value, 0) + 1
+
+    @property
+    def numberOfReachedFamilies(self):
+        return sum(self.counts["gen1"].values())
+
+    def histogramPrecision(self, name):
+        """
+        :param name: "gen1", "gen2" or "gen3" (string)
+        :return: value, proportion and half width of the confidence interval per bin of the histogram (list of dictionaries)
+        """
+        total = self.numberOfReachedFamilies
+        bins = sorted(self.counts[name])
+        halfWidths = wilsonHalfWidth([self.counts[name][value] for value in bins], total, self.z)
+        return [{"value": int(value), "proportion": self.counts[name][value] / total, "halfWidth": float(halfWidth)}
+                for value, halfWidth in zip(bins, halfWidths)]
+
+    def precision(self):
+        """
+        As long as no family reached the target, the histograms are not known at all (precision 1).
+        :return: largest half width of all confidence intervals (float)
+        """
+        halfWidths = [float(wilsonHalfWidth(self.numberOfExtinctFamilies, self.numberOfFamilies, self.z))]
+        for name in self.histograms:
+            if self.numberOfReachedFamilies == 0:
+                halfWidths.append(1.0)
+            halfWidths.extend(element["halfWidth"] for element in self.histogramPrecision(name))
+        return max(halfWidths)
+
+    def summary(self):
+        """
+        :return: achieved precision of the extinction rate and of every bin of the histograms (dictionary)
+        """
+        extinctionRate = self.numberOfExtinctFamilies / max(self.numberOfFamilies, 1)
+        return {"confidence": self.confidence, "numberOfFamilies": self.numberOfFamilies,
+                "numberOfReachedFamilies": self.numberOfReachedFamilies, "precision": self.precision(),
+                "extinctionRate": {"proportion": extinctionRate,
+                                   "halfWidth": float(wilsonHalfWidth(self.numberOfExtinctFamilies,
+                                                                      self.numberOfFamilies, self.z))},
+                "histograms": {name: self.histogramPrecision(name) for name in self.histograms}}
+
+
+def runAdaptive(sampler, maxGeneration, aimList, targetPrecision, maxFamilies, batchSize=1000, maxSeconds=None,
+                confidence=0.95, numberOfWorkers=1, collectStatistics=True, engine="individual", result=None,
+                measurements=None):
+    """
+    This function simulates families in batches until the confidence intervals of all bins of the gen1, gen2 and
+    gen3 histograms and of the extinction rate are at most targetPrecision wide on each side, or the budget is used up.
+    The families are the same as in a run with a fixed number of families and the same seed.
+    :param sampler: sampler of the simulation (OffspringSampler)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :param aimList: number of individuals per location, largest value first (list)
+    :param targetPrecision: largest allowed half width of the confidence intervals, e.g. 0.01 (float)
+    :param maxFamilies: largest number of families to simulate (integer)
+    :param batchSize: number of families between two checks of the precision (integer)
+    :param maxSeconds: largest duration of the simulation in seconds, None for no limit (float)
+    :param confidence: confidence level of the intervals (float)
+    :param numberOfWorkers: number of processes, None for one per processor core (integer)
+    :param collectStatistics: simulate all generations for the lists per generation (boolean)
+    :param engine: name of the simulation of one family, key of runner.engines (string)
+    :param result: receives the outcome of each family, a new SimulationResult if None (SimulationResult or ResultWriter)
+    :param measurements: receives the measured phases and counters, nothing is measured if None (Measurements)
+    :return: the result and the monitor with the achieved precision (tuple)
+    """
+    if result is None:
+        result = SimulationResult()
+    monitor = ConvergenceMonitor(result, confidence)
+    start = time.perf_counter()
+    stopReason = "budget"
+    if numberOfWorkers is None:
+        numberOfWorkers = os.cpu_count() or 1
+    # one pool of processes for all batches, not a new one per batch
+    pool = ProcessPoolExecutor(max_workers=numberOfWorkers) if numberOfWorkers > 1 else nullcontext()
+    with pool as executor:
+        while monitor.numberOfFamilies < maxFamilies:
+            numberOfFamilies = min(batchSize, maxFamilies - monitor.numberOfFamilies)
+            runFamilies(sampler, numberOfFamilies, maxGeneration, aimList, numberOfWorkers,
+                        collectStatistics=collectStatistics, engine=engine, result=monitor, measurements=measurements,
+                        firstFamily=monitor.numberOfFamilies, executor=executor)
+            precision = monitor.precision()
+            logger.info("Families: %d, precision: %.4f", monitor.numberOfFamilies, precision)
+            if precision <= targetPrecision:
+                stopReason = "precision"
+                break
+            if maxSeconds is not None and time.perf_counter() - start >= maxSeconds:
+                stopReason = "time"
+                break
+    monitor.stopReason = stopReason
+    return result, monitor
+
+
+def writePrecision(path, monitor, targetPrecision):
+    """
+    Writes the achieved precision next to the CSV files.
+    :param path: path of the JSON file (string)
+    :param monitor: monitor of the finished run (ConvergenceMonitor)
+    :param targetPrecision: requested half width of the confidence intervals (float)
+    """
+    summary = {"targetPrecision": targetPrecision, "stopReason": monitor.stopReason}
+    summary.update(monitor.summary())
+    with open(path, 'w') as file:
+        json.dump(summary, file, indent=1)
@@ -0,0 +1,211 @@
+import math
+
+import numpy as np
+
+
+def thinnedDistribution(pmf, probability):
+    """
+    Distribution of the number of successes if each of k trials succeeds independently, k distributed as pmf.
+    :param pmf: probabilities of k = 0, 1, 2, ... (numpy array)
+    :param probability: probability of success of one trial (float)
+    :return: probabilities of 0, 1, 2, ... successes (numpy array)
+    """
+    thinned = np.zeros(len(pmf))
+    # binomial probabilities of 0 to k successes, each row follows from the row of k - 1 trials
+    binomial = np.ones(1)
+    for k, weight in enumerate(pmf):
+        if k > 0:
+            binomial = np.append(binomial, 0.0) * (1 - probability) + np.append(0.0, binomial) * probability
+        thinned[:k + 1] += weight * binomial
+    return thinned
+
+
+def processMoments(firstPmf, offspringPmf, maxGeneration):
+    """
+    Mean and variance of a Galton-Watson process that starts with one individual,
+    Var(Z_g) = E(Z_g-1) Var(Y) + E(Y)^2 Var(Z_g-1) with Y the number of offspring of one individual.
+    :param firstPmf: distribution of the offspring of the first individual (numpy array)
+    :param offspringPmf: distribution of the offspring of every later individual (numpy array)
+    :param maxGeneration: last generation (integer)
+    :return: means and variances, generation 0 to maxGeneration (tuple of numpy arrays)
+    """
+    def moments(pmf):
+        values = np.arange(len(pmf))
+        mean = np.dot(values, pmf)
+        return mean, np.dot(values ** 2, pmf) - mean ** 2
+
+    firstMean, firstVariance = moments(firstPmf)
+    offspringMean, offspringVariance = moments(offspringPmf)
+    means = [1.0, firstMean]
+    variances = [0.0, firstVariance]
+    for generation in range(2, maxGeneration + 1):
+        variances.append(means[-1] * offspringVariance + offspringMean ** 2 * variances[-1])
+        means.append(means[-1] * offspringMean)
+    return np.array(means[:maxGeneration + 1]), np.array(variances[:maxGeneration + 1])
+
+
+def transformSize(mean, variance):
+    """
+    :return: number of roots of unity for the FFT, covering the mean and 10 standard deviations (integer)
+    """
+    return 2 ** max(int(math.ceil(math.log2(mean + 10 * math.sqrt(variance) + 2))), 4)
+
+
+class GeneratingFunctionModel:
+    """
+    The adult males of a family form a Galton-Watson process, so its distributions follow from the probability
+    generating functions (pgf) without simulation.
+    The initial person has children according to the distribution of children, every later adult male remains
+    childless with childlessProbability and otherwise has children according to the same distribution.
+    Each child is an adult male with probability (1 - femaleProbability) * (1 - earlyDeathProbability).
+    Generation g has adult males with pgf rootPgf(f(f(...f(s)))) with g - 1 times the pgf f of one adult male.
+    Serves for a fast screening of parameters and to check the simulations (extinctGenerationList,
+    maleAduldNumberPerGenerationListList, number of branches).
+    """
+
+    def __init__(self, sampler):
+        """
+        :param sampler: parameters of the simulation, the random stream is not used (OffspringSampler)
+        """
+        pmf = sampler.distribution.pmf
+        self.childrenPmf = pmf
+        self.childlessProbability = sampler.childlessProbability
+        self.adultMaleProbability = (1 - sampler.femaleProbability) * (1 - sampler.earlyDeathProbability)
+        # number of adult male children of the initial person
+        self.rootPmf = thinnedDistribution(pmf, self.adultMaleProbability)
+        # number of adult male children of every other adult male
+        self.offspringPmf = (1 - self.childlessProbability) * self.rootPmf
+        self.offspringPmf[0] += self.childlessProbability
+        # probability that an adult male has no children at all (not only no adult male children)
+        self.rootNoChildren = float(pmf[0])
+        self.noChildren = self.childlessProbability + (1 - self.childlessProbability) * float(pmf[0])
+
+    def rootPgf(self, s):
+        return np.polyval(self.rootPmf[::-1], s)
+
+    def offspringPgf(self, s):
+        return np.polyval(self.offspringPmf[::-1], s)
+
+    def adultMalePgf(self, generation, s):
+        """
+        :param generation: generation (integer)
+        :param s: arguments of the pgf, may be complex (numpy array)
+        :return: pgf of the number of adult males of the generation at s (numpy array)
+        """
+        s = np.asarray(s)
+        if generation == 0:
+            return s
+        for step in range(generation - 1):
+            s = self.offspringPgf(s)
+        return self.rootPgf(s)
+
+    def meanAdultMales(self, maxGeneration):
+        """
+        :param maxGeneration: last generation (integer)
+        :return: expected number of adult males, generation 0 to maxGeneration (numpy array)
+        """
+        return processMoments(self.rootPmf, self.offspringPmf, maxGeneration)[0]
+
+    def varianceAdultMales(self, maxGeneration):
+        """
+        :param maxGeneration: last generation (integer)
+        :return: variance of the number of adult males, generation 0 to maxGeneration (numpy array)
+        """
+        return processMoments(self.rootPmf, self.offspringPmf, maxGeneration)[1]
+
+    def meanPersons(self, maxGeneration):
+        """
+        :param maxGeneration: last generation (integer)
+        :return: expected number of persons, generation 0 to maxGeneration (numpy array)
+        """
+        childrenMean = np.dot(np.arange(len(self.childrenPmf)), self.childrenPmf)
+        adultMales = self.meanAdultMales(maxGeneration)
+        means = [1.0]
+        for generation in range(1, maxGeneration + 1):
+            fathers = adultMales[0] if generation == 1 else adultMales[generation - 1] * (1 - self.childlessProbability)
+            means.append(fathers * childrenMean)
+        return np.array(means)
+
+    def extinctProbabilities(self, maxGeneration):
+        """
+        A generation is empty if none of the adult males of the generation before has children.
+        :param maxGeneration: last generation (integer)
+        :return: probability that the family has no persons in the generation, generation 0 to maxGeneration
+                 (numpy array)
+        """
+        probabilities = [0.0]
+        if maxGeneration >= 1:
+            probabilities.append(self.rootNoChildren)
+        for generation in range(2, maxGeneration + 1):
+            probabilities.append(float(self.adultMalePgf(generation - 1, self.noChildren)))
+        return np.array(probabilities)
+
+    def extinctGenerationDistribution(self, maxGeneration):
+        """
+        :param maxGeneration: last generation (integer)
+        :return: probability that the family dies out in the generation (first empty generation),
+                 generation 0 to maxGeneration, as extinctGenerationList divided by the number of families (numpy array)
+        """
+        return np.diff(self.extinctProbabilities(maxGeneration), prepend=0.0)
+
+    def adultMaleDistribution(self, generation, size=None):
+        """
+        The pgf is evaluated at the roots of unity and transformed back with an inverse FFT.
+        :param generation: generation (integer)
+        :param size: largest number of adult males + 1, enough for 10 standard deviations above the mean if None
+                     (integer)
+        :return: probability of 0, 1, 2, ... adult males in the generation (numpy array)
+        """
+        if size is None:
+            means, variances = processMoments(self.rootPmf, self.offspringPmf, generation)
+            size = transformSize(means[generation], variances[generation])
+        roots = np.exp(2j * np.pi * np.arange(size) / size)
+        # coefficients of the pgf: (1 / size) * sum_k pgf(root_k) * root_k^(-n)
+        pmf = np.fft.fft(self.adultMalePgf(generation, roots)).real / size
+        return np.clip(pmf, 0.0, None)
+
+    def survivalProbabilities(self, steps):
+        """
+        :param steps: number of generations (integer)
+        :return: probability that an adult male still has adult male descendants 0 to steps generations later
+                 (numpy array)
+        """
+        probabilities = [1.0]
+        s = 0.0
+        for step in range(steps):
+            s = self.offspringPgf(s)
+            probabilities.append(1.0 - float(s))
+        return np.array(probabilities)
+
+    def expectedBranches(self, maxGeneration, steps=4):
+        """
+        Expected number of branches as counted in the check of the simulation: the adult males of the generation
+        steps generations before that still have adult male descendants in the generation.
+        :param maxGeneration: last generation (integer)
+        :param steps: number of generations to the progenitor of a branch (integer)
+        :return: expected number of branches, generation 0 to maxGeneration, 0 before generation steps (numpy array)
+        """
+        adultMales = self.meanAdultMales(maxGeneration)
+        survival = self.survivalProbabilities(steps)[steps]
+        branches = np.array([adultMales[generation - steps] * survival if generation >= steps else 0.0
+                             for generation in range(maxGeneration + 1)])
+        if maxGeneration >= steps:
+            # the initial person always has children
+            branches[steps] = 1.0 - float(self.adultMalePgf(steps, 0.0))
+        return branches
+
+    def descendantDistribution(self, steps, size=None):
+        """
+        :param steps: number of generations (integer)
+        :param size: largest number of descendants + 1 (integer)
+        :return: probability of 0, 1, 2, ... adult male descendants of one adult male steps generations later,
+                 i.e. the number of persons in one branch (numpy array)
+        """
+        if size is None:
+            means, variances = processMoments(self.offspringPmf, self.offspringPmf, steps)
+            size = transformSize(means[steps], variances[steps])
+        roots = np.exp(2j * np.pi * np.arange(size) / size)
+        s = roots
+        for step in range(steps):
+            s = self.offspringPgf(s)
+        return np.clip(np.fft.fft(s).real / size, 0.0, None)
@@ -0,0 +1,41 @@
+import numpy as np
+
+import instrumentation
+
+
+class AncestryIndex:
+    """
+    Precomputed ancestry of a pedigree, so that ancestors do not have to be searched person by person.
+    Ancestors several generations back are found by binary lifting: ancestorTable[j] holds for every person the
+    ancestor 2^j generations before (-1 if there is none), any number of generations is combined from these jumps.
+    """
+
+    def __init__(self, pedigree):
+        """
+        :param pedigree: simulated family (Pedigree)
+        """
+        self.pedigree = pedigree
+        self.ancestorTable = [pedigree.father.astype(np.int64)]
+        # one jump per power of two up to the number of generations
+        for level in range(1, max(pedigree.maxGeneration, 1).bit_length()):
+            previous = self.ancestorTable[-1]
+            self.ancestorTable.append(np.where(previous >= 0, previous[np.maximum(previous, 0)], -1))
+
+    def ancestors(self, persons, steps):
+        """
+        :param persons: indices of persons (numpy array)
+        :param steps: number of generations to go back (integer)
+        :return: index of the ancestor per person, -1 beyond the initial person (numpy array)
+        """
+        result = np.asarray(persons, dtype=np.int64)
+        level = 0
+        while steps > 0 and level < len(self.ancestorTable):
+            if steps & 1:
+                result = np.where(result >= 0, self.ancestorTable[level][np.maximum(result, 0)], -1)
+                instrumentation.count("ancestorSteps", len(result))
+            steps = steps >> 1
+            level = level + 1
+        if steps > 0:
+            # more generations back than were simulated
+            result = np.full(len(result), -1, dtype=np.int64)
+        return result
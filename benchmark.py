@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analytic import GeneratingFunctionModel
+from runner import runFamilies
+from sampler import OffspringSampler
+
+# variants of the simulation: engine and whether all generations are simulated for the statistics
+variants = {"reference": ("reference", True),
+            "individual": ("individual", True),
+            "individual-early": ("individual", False),
+            "counts": ("counts", True),
+            "counts-early": ("counts", False)}
+
+# parameters of scenario B
+demographicParameters = {"a": 6, "loc": 3, "scale": 6, "sexRatioMale": 50, "sexRatioFemale": 50,
+                         "earlyLifeRatio": 60, "earlyDeathRatio": 40, "noChildlessRatio": 80, "childlessRatio": 20}
+aimList = [10, 6, 6, 6, 4, 4, 4, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2]
+
+
+def runCase(variant, maxGeneration, numberOfSimulatedFamilies, seed):
+    """
+    This function simulates one case of the benchmark, it is run in a new process so the peak memory is its own.
+    :param variant: key of variants (string)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :param numberOfSimulatedFamilies: number of families to simulate (integer)
+    :param seed: seed of the random numbers (integer)
+    :return: measurements and lists of the case (dictionary)
+    """
+    engine, collectStatistics = variants[variant]
+    sampler = OffspringSampler(seed=seed, **demographicParameters)
+    start = time.perf_counter()
+    result = runFamilies(sampler, numberOfSimulatedFamilies, maxGeneration, aimList, 1,
+                         collectStatistics=collectStatistics, engine=engine)
+    seconds = time.perf_counter() - start
+
+    # ru_maxrss is given in kilobytes on Linux and in bytes on macOS
+    peakRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peakRss = peakRss * 1024
+    persons = None
+    if collectStatistics:
+        persons = int(sum(sum(numberPerGenerationList)
+                          for numberPerGenerationList in result.numberPerGenerationListList))
+    return {"variant": variant, "maxGeneration": maxGeneration, "families": numberOfSimulatedFamilies,
+            "seconds": seconds, "familiesPerSecond": numberOfSimulatedFamilies / seconds,
+            "personsPerSecond": None if persons is None else persons / seconds, "peakRss": peakRss,
+            "collectStatistics": collectStatistics, "gen1List": result.gen1List, "gen2List": result.gen2List,
+            "extinctGenerationList": result.extinctGenerationList}
+
+
+def caseKey(case):
+    return case["variant"] + "-" + str(case["maxGeneration"]) + "-" + str(case["families"])
+
+
+def equivalenceTests(reference, case):
+    """
+    Two-sample Kolmogorov-Smirnov tests between the lists of the reference and of another variant.
+    The extinctions are only compared if both simulated all generations.
+    :param reference: case of the reference (dictionary)
+    :param case: case of the compared variant (dictionary)
+    :return: p-value per list (dictionary)
+    """
+    from scipy.stats import ks_2samp
+
+    names = ["gen1List", "gen2List"]
+    if case["collectStatistics"]:
+        names.append("extinctGenerationList")
+    pValues = {}
+    for name in names:
+        if len(reference[name]) > 0 and len(case[name]) > 0:
+            pValues[name] = float(ks_2samp(reference[name], case[name]).pvalue)
+    return pValues
+
+
+def analyticTest(case):
+    """
+    Chi-squared test of the extinct generations of a case against the probabilities of the generating functions.
+    Generations expected less than five times are combined into one class.
+    :param case: case that simulated all generations (dictionary)
+    :return: p-value (float)
+    """
+    from scipy.stats import chisquare
+
+    model = GeneratingFunctionModel(OffspringSampler(**demographicParameters))
+    probabilities = model.extinctGenerationDistribution(case["maxGeneration"])
+    # the last class are the families that did not die out
+    probabilities = np.append(probabilities, 1 - probabilities.sum())
+    observed = np.bincount(case["extinctGenerationList"], minlength=case["maxGeneration"] + 1)
+    observed = np.append(observed, case["families"] - observed.sum())
+    expected = probabilities * case["families"]
+    small = expected < 5
+    observed = np.append(observed[~small], observed[small].sum())
+    expected = np.append(expected[~small], expected[small].sum())
+    if expected[-1] == 0:
+        observed = observed[:-1]
+        expected = expected[:-1]
+    return float(chisquare(observed, expected * observed.sum() / expected.sum()).pvalue)
+
+
+def compareWithBaseline(case, baseline, tolerance):
+    """
+    :param case: measured case (dictionary)
+    :param baseline: stored measurements per case (dictionary)
+    :param tolerance: allowed relative deviation (float)
+    :return: descriptions of the regressions (list)
+    """
+    stored = baseline.get(caseKey(case))
+    if stored is None:
+        return []
+    regressions = []
+    if case["familiesPerSecond"] < stored["familiesPerSecond"] * (1 - tolerance):
+        regressions.append("families/s %.1f instead of %.1f"
+                           % (case["familiesPerSecond"], stored["familiesPerSecond"]))
+    if case["peakRss"] > stored["peakRss"] * (1 + tolerance):
+        regressions.append("peak RSS %.0f MB instead of %.0f MB"
+                           % (case["peakRss"] / 2 ** 20, stored["peakRss"] / 2 ** 20))
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark of the simulation variants")
+    parser.add_argument("--variants", nargs="+", default=list(variants), choices=list(variants))
+    parser.add_argument("--generations", nargs="+", type=int, default=[8, 11, 15])
+    parser.add_argument("--families", nargs="+", type=int, default=[100, 1000])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reference-max-generation", type=int, default=11,
+                        help="the reference is only run up to this number of generations")
+    parser.add_argument("--reference-families", type=int, default=200,
+                        help="the reference simulates at most this number of families")
+    parser.add_argument("--baseline", default="benchmark-baseline.json", help="file of the stored measurements")
+    parser.add_argument("--save-baseline", action="store_true", help="store the measurements as new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative deviation from the baseline")
+    parser.add_argument("--alpha", type=float, default=0.01, help="significance level of the equivalence tests")
+    arguments = parser.parse_args(arguments)
+
+    baseline = {}
+    if os.path.exists(arguments.baseline):
+        with open(arguments.baseline) as file:
+            baseline = json.load(file)
+
+    cases = []
+    failures = []
+    for maxGeneration in arguments.generations:
+        for numberOfSimulatedFamilies in arguments.families:
+            reference = None
+            for variant in arguments.variants:
+                families = numberOfSimulatedFamilies
+                if variant == "reference":
+                    if maxGeneration > arguments.reference_max_generation:
+                        continue
+                    families = min(families, arguments.reference_families)
+                # every case in a new process, so that the peak memory of earlier cases is not included
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    case = executor.submit(runCase, variant, maxGeneration, families, arguments.seed).result()
+                cases.append(case)
+
+                line = "%-17s gen %2d  families %6d  %9.1f families/s  %12s persons/s  %7.0f MB" % (
+                    variant, maxGeneration, families, case["familiesPerSecond"],
+                    "-" if case["personsPerSecond"] is None else "%.0f" % case["personsPerSecond"],
+                    case["peakRss"] / 2 ** 20)
+                if case["collectStatistics"]:
+                    pValue = analyticTest(case)
+                    line = line + "  pgf p: %.3f" % pValue
+                    if pValue < arguments.alpha:
+                        failures.append(caseKey(case) + ": extinctions differ from the generating functions")
+                if variant == "reference":
+                    reference = case
+                elif reference is not None:
+                    pValues = equivalenceTests(reference, case)
+                    line = line + "  KS p: " + ", ".join("%s %.3f" % (name, pValue)
+                                                         for name, pValue in pValues.items())
+                    for name, pValue in pValues.items():
+                        if pValue < arguments.alpha:
+                            failures.append(caseKey(case) + ": " + name + " differs from the reference")
+                for regression in compareWithBaseline(case, baseline, arguments.tolerance):
+                    failures.append(caseKey(case) + ": " + regression)
+                print(line, flush=True)
+
+    if arguments.save_baseline:
+        for case in cases:
+            baseline[caseKey(case)] = {"familiesPerSecond": case["familiesPerSecond"], "peakRss": case["peakRss"]}
+        with open(arguments.baseline, 'w') as file:
+            json.dump(baseline, file, indent=1, sort_keys=True)
+
+    for failure in failures:
+        print("Failed:", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
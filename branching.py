@@ -0,0 +1,194 @@
+import copy
+import logging
+from collections import deque
+
+import numpy as np
+
+import instrumentation
+from family import FamilyResult, TargetCheck, extinctGenerationOfAdultMales
+from instrumentation import phase
+
+logger = logging.getLogger(__name__)
+
+
+def simulateFamilyCounts(sampler, maxGeneration, aimList, collectStatistics=True):
+    """
+    This function simulates one family as a branching process on numbers of persons instead of individual persons.
+    Only adult males can have descendants, so women and children who died early are only counted.
+    Until there are enough branches, the adult males of the last four generations are kept with their ancestors,
+    because the branches are defined by the progenitors four generations before.
+    Afterwards only the number of adult males per branch is simulated: the fathers, children and adult male
+    children of a branch are drawn with binomial and multinomial distributions, so the memory grows with the
+    number of branches and not with the number of persons.
+    The outcome has the same distribution as simulateFamily, but not the same values for a seed.
+    :param sampler: source of the random numbers (OffspringSampler)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :param aimList: number of individuals per location, largest value first (list)
+    :param collectStatistics: simulate all generations for the lists per generation (boolean)
+    :return: outcome of the family, without statistics the lists per generation are None (FamilyResult)
+    """
+    family = FamilyCounts(sampler, aimList)
+    for generation in range(1, maxGeneration + 1):
+        family.step()
+        if not collectStatistics and family.finished:
+            break
+    logger.debug("Persons were generated")
+    if not collectStatistics:
+        family.continueUntilExtinct(maxGeneration)
+    return family.result(collectStatistics)
+
+
+class FamilyCounts:
+    """
+    State of one family of simulateFamilyCounts, simulated one generation per step().
+    The state only consists of numbers per branch and the ancestors of the last four generations, so a family
+    can be copied in the middle of its simulation and continued with another random stream (clone).
+    """
+
+    def __init__(self, sampler, aimList):
+        """
+        :param sampler: source of the random numbers (OffspringSampler)
+        :param aimList: number of individuals per location, largest value first (list)
+        """
+        self.sampler = sampler
+        self.check = TargetCheck(aimList)
+        # last simulated generation
+        self.generation = 0
+
+        # number of persons and adult males per generation, generation 0 is the initial person
+        self.numberPerGenerationList = [1]
+        self.maleAduldNumberPerGenerationList = [1]
+        self.extinctGeneration = ""
+
+        # adult males of the current generation: ancestors[j] holds for each of them the position of his ancestor
+        # j generations before in the list of adult males of that generation (j = 0 is the male himself)
+        self.ancestors = [np.zeros(1, dtype=np.int64)]
+        # ancestors of the adult males of the three previous generations
+        self.history = deque(maxlen=3)
+        # number of adult males per branch, only once there are enough branches
+        self.branchCounts = None
+
+    @property
+    def numberOfAdultMales(self):
+        return self.maleAduldNumberPerGenerationList[-1]
+
+    @property
+    def finished(self):
+        """
+        True as soon as the outcome is decided (enough people per branch) or the family died out.
+        """
+        return self.check.decided or self.numberPerGenerationList[-1] == 0
+
+    def step(self):
+        """
+        Simulates the next generation and compares it with the aimList.
+        """
+        sampler = self.sampler
+        check = self.check
+        generation = self.generation + 1
+        self.generation = generation
+        if self.branchCounts is None:
+            ancestors = self.ancestors
+            with phase("personGeneration"):
+                # the initial person had children in any case
+                hasChildren = np.ones(len(ancestors[0]), dtype=bool)
+                if generation > 1:
+                    hasChildren = sampler.childless(len(ancestors[0])) == 0
+                fathers = np.flatnonzero(hasChildren)
+                numberOfChildren = sampler.numberOfChildren(len(fathers))
+                adultSons = sampler.adultMaleChildren(numberOfChildren)
+                numberOfPersons = int(numberOfChildren.sum())
+                numberOfFathers = len(fathers)
+
+            with phase("branchCollection"):
+                # the adult males of the new generation inherit the ancestors of their fathers
+                fatherOfSon = np.repeat(fathers, adultSons)
+                self.history.append(ancestors)
+                ancestors = [np.arange(len(fatherOfSon))] + [previous[fatherOfSon] for previous in ancestors[:4]]
+                self.ancestors = ancestors
+                numberOfAdultMales = len(fatherOfSon)
+                # every adult male takes over up to four ancestors of his father
+                instrumentation.count("ancestorSteps", numberOfAdultMales * (len(ancestors) - 1))
+
+            # before generation 4 all males have the same (unknown) progenitor
+            if check.enoughBranches(generation, numberOfAdultMales,
+                                    lambda: len(np.unique(ancestors[4])) if len(ancestors) > 4 else 1):
+                with phase("aimListMatching"):
+                    self.branchCounts = firstBranchCounts(check, ancestors, self.history, generation)
+                self.ancestors = None
+                self.history.clear()
+        else:
+            with phase("personGeneration"):
+                fathers = sampler.fathersAmong(self.branchCounts)
+                numberOfChildren = sampler.childrenOfGroups(fathers)
+                self.branchCounts = sampler.adultMaleChildren(numberOfChildren)
+                numberOfPersons = int(numberOfChildren.sum())
+                numberOfAdultMales = int(self.branchCounts.sum())
+                numberOfFathers = int(fathers.sum())
+            if not check.decided:
+                with phase("aimListMatching"):
+                    check.matchesAim(self.branchCounts, generation)
+        instrumentation.count("fathers", numberOfFathers)
+        instrumentation.count("persons", numberOfPersons)
+
+        if check.decided and self.branchCounts is not None and len(self.branchCounts) > 1:
+            # the branches are no longer needed, only the total number of adult males
+            self.branchCounts = np.array([self.branchCounts.sum()])
+
+        self.numberPerGenerationList.append(numberOfPersons)
+        self.maleAduldNumberPerGenerationList.append(numberOfAdultMales)
+        if numberOfPersons == 0 and self.extinctGeneration == "":
+            self.extinctGeneration = generation
+
+    def continueUntilExtinct(self, maxGeneration):
+        """
+        Continues a decided family only on the total number of adult males, until it dies out or maxGeneration is
+        reached, so that the generation of dying out is known without the lists per generation.
+        :param maxGeneration: number of generations to be simulated (integer)
+        """
+        if self.extinctGeneration == "":
+            self.extinctGeneration = extinctGenerationOfAdultMales(self.sampler, self.numberOfAdultMales,
+                                                                   self.generation, maxGeneration)
+
+    def clone(self, sampler):
+        """
+        :param sampler: random stream of the copy (OffspringSampler)
+        :return: copy of the family in its current state, continued with the sampler (FamilyCounts)
+        """
+        # the sampler is replaced instead of copied, the table of the distribution is shared
+        return copy.deepcopy(self, {id(self.sampler): sampler})
+
+    def result(self, collectStatistics=True):
+        """
+        :param collectStatistics: return the lists per generation (boolean)
+        :return: outcome of the family, without statistics the lists per generation are None (FamilyResult)
+        """
+        if not collectStatistics:
+            return FamilyResult(self.check.gen1, self.check.gen2, self.extinctGeneration, None, None)
+        return FamilyResult(self.check.gen1, self.check.gen2, self.extinctGeneration, self.numberPerGenerationList,
+                            self.maleAduldNumberPerGenerationList)
+
+
+def firstBranchCounts(check, ancestors, history, generation):
+    """
+    This function compares the generations simulated so far with the aimList, once there are enough branches.
+    The branches are the adult males of generation relevantGeneration + 1, as in TargetCheck.
+    :param check: check of the family with relevantGeneration set (TargetCheck)
+    :param ancestors: ancestors of the adult males of the generation (list of numpy arrays)
+    :param history: ancestors of the adult males of the three previous generations (deque of lists of numpy arrays)
+    :param generation: last simulated generation (integer)
+    :return: number of adult males per branch in the generation (numpy array)
+    """
+    branchGeneration = check.relevantGeneration + 1
+    numberOfBranches = len(history[0][0])
+    # number of adult males per branch in the generations after the branch generation
+    countsPerGeneration = {}
+    for position, generationAncestors in enumerate(list(history)[1:] + [ancestors]):
+        gen = branchGeneration + 1 + position
+        countsPerGeneration[gen] = np.bincount(generationAncestors[gen - branchGeneration],
+                                               minlength=numberOfBranches)
+    for gen in range(check.relevantGeneration, generation + 1):
+        # nobody is counted as descendant of himself
+        if check.matchesAim(countsPerGeneration.get(gen, np.zeros(numberOfBranches, dtype=np.int64)), gen):
+            break
+    return countsPerGeneration[generation]
@@ -0,0 +1,320 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import instrumentation
+from family import analyseFamilyTargets
+from output import writtenInOneStep
+from pedigree import Pedigree, generatePedigree
+from runner import defaultChunkSize, familyChunks, resultsInOrder
+from sweep import writeJson
+
+logger = logging.getLogger(__name__)
+
+# files of an ensemble and the type of their values
+ensembleFiles = {"father": np.int32, "flags": np.int8, "familyOffsets": np.int64, "generationOffsets": np.int64}
+
+
+def ensembleParameters(sampler):
+    """
+    The simulated families only depend on the demographic parameters and the seed, not on the aimList.
+    :param sampler: sampler of the simulation (OffspringSampler)
+    :return: demographic parameters and seed (dictionary)
+    """
+    return {"a": sampler.a, "loc": sampler.loc, "scale": sampler.scale, "sexRatioMale": sampler.sexRatioMale,
+            "sexRatioFemale": sampler.sexRatioFemale, "earlyLifeRatio": sampler.earlyLifeRatio,
+            "earlyDeathRatio": sampler.earlyDeathRatio, "noChildlessRatio": sampler.noChildlessRatio,
+            "childlessRatio": sampler.childlessRatio, "seed": str(sampler.seedSequence.entropy),
+            "spawnKey": list(sampler.seedSequence.spawn_key)}
+
+
+def ensembleKey(sampler):
+    """
+    :param sampler: sampler of the simulation (OffspringSampler)
+    :return: hash of the demographic parameters and the seed (string)
+    """
+    return hashlib.sha256(json.dumps(ensembleParameters(sampler), sort_keys=True).encode()).hexdigest()[:32]
+
+
+class Ensemble:
+    """
+    Simulated families saved in a directory, read as memory maps so only the families in use are loaded.
+    The persons of all families are stored one after another: father (index within the family),
+    flags (bit 0 sex, bit 1 earlyDeath, bit 2 childless), the start of each family (familyOffsets)
+    and the start of each generation within its family (generationOffsets, one row per family).
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: directory of the ensemble (string)
+        """
+        self.directory = directory
+        with open(os.path.join(directory, "ensemble.json")) as file:
+            self.settings = json.load(file)
+        self.numberOfFamilies = self.settings["numberOfFamilies"]
+        self.maxGeneration = self.settings["maxGeneration"]
+        shapes = {"father": (self.settings["numberOfPersons"],), "flags": (self.settings["numberOfPersons"],),
+                  "familyOffsets": (self.numberOfFamilies + 1,),
+                  "generationOffsets": (self.numberOfFamilies, self.maxGeneration + 2)}
+        for name, dtype in ensembleFiles.items():
+            setattr(self, name, np.memmap(os.path.join(directory, name + ".bin"), dtype=dtype, mode='r',
+                                          shape=shapes[name]))
+
+    def pedigree(self, famNum, maxGeneration=None):
+        """
+        :param famNum: number of the family (integer)
+        :param maxGeneration: number of generations, fewer than simulated cuts off the later ones (integer)
+        :return: simulated family (Pedigree)
+        """
+        if maxGeneration is None:
+            maxGeneration = self.maxGeneration
+        generationOffsets = np.array(self.generationOffsets[famNum, :maxGeneration + 2])
+        start = int(self.familyOffsets[famNum])
+        stop = start + int(generationOffsets[-1])
+        flags = np.array(self.flags[start:stop])
+        return Pedigree(np.array(self.father[start:stop]), (flags & 1).astype(np.int8),
+                        ((flags >> 1) & 1).astype(np.int8), ((flags >> 2) & 1).astype(np.int8), generationOffsets)
+
+
+class EnsembleWriter:
+    """
+    Appends simulated families to the files of an ensemble, nothing but the current family is kept in memory.
+    """
+
+    def __init__(self, directory, maxGeneration, settings):
+        """
+        :param directory: directory of the ensemble, created if needed (string)
+        :param maxGeneration: number of simulated generations (integer)
+        :param settings: values saved with the ensemble, e.g. the parameters (dictionary)
+        """
+        self.directory = directory
+        self.maxGeneration = maxGeneration
+        self.settings = settings
+        os.makedirs(directory, exist_ok=True)
+        self.files = {name: open(os.path.join(directory, name + ".bin"), 'wb') for name in ensembleFiles}
+        self.numberOfFamilies = 0
+        self.numberOfPersons = 0
+        np.zeros(1, dtype=np.int64).tofile(self.files["familyOffsets"])
+
+    def add(self, pedigree):
+        """
+        :param pedigree: next simulated family (Pedigree)
+        """
+        flags = pedigree.sex | (pedigree.earlyDeath << 1) | (pedigree.childless << 2)
+        pedigree.father.astype(np.int32).tofile(self.files["father"])
+        flags.astype(np.int8).tofile(self.files["flags"])
+        pedigree.generationOffsets.astype(np.int64).tofile(self.files["generationOffsets"])
+        self.numberOfFamilies = self.numberOfFamilies + 1
+        self.numberOfPersons = self.numberOfPersons + pedigree.numberOfPersons
+        np.array([self.numberOfPersons], dtype=np.int64).tofile(self.files["familyOffsets"])
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+        settings = dict(self.settings)
+        settings.update({"numberOfFamilies": self.numberOfFamilies, "numberOfPersons": self.numberOfPersons,
+                         "maxGeneration": self.maxGeneration})
+        writeJson(os.path.join(self.directory, "ensemble.json"), settings)
+
+
+def simulatePedigrees(sampler, firstFamily, lastFamily, maxGeneration):
+    """
+    :param sampler: sampler of the simulation (OffspringSampler)
+    :param firstFamily: number of the first family of the chunk (integer)
+    :param lastFamily: number after the last family of the chunk (integer)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :return: simulated families in order, the same as simulateFamily creates for this seed (list of Pedigree)
+    """
+    return [generatePedigree(maxGeneration, sampler.forFamily(famNum)) for famNum in range(firstFamily, lastFamily)]
+
+
+def analyseFamilies(directory, firstFamily, lastFamily, maxGeneration, aimLists):
+    """
+    :param directory: directory of the ensemble (string)
+    :param firstFamily: number of the first family of the chunk (integer)
+    :param lastFamily: number after the last family of the chunk (integer)
+    :param maxGeneration: number of generations to be analysed (integer)
+    :param aimLists: number of individuals per location for each target (list of lists)
+    :return: outcomes for each aimList per family in order (list of lists of FamilyResult)
+    """
+    ensemble = Ensemble(directory)
+    return [analyseFamilyTargets(ensemble.pedigree(famNum, maxGeneration), aimLists)
+            for famNum in range(firstFamily, lastFamily)]
+
+
+def measuredChunk(function, *arguments):
+    """
+    Runs the function of a chunk and measures the phases and counters in the process that runs it.
+    :param function: returns one value per family of a chunk (function)
+    :param arguments: arguments of the function
+    :return: values of the function and measurements of the chunk (tuple)
+    """
+    with instrumentation.collect() as measurements:
+        values = function(*arguments)
+    return values, measurements
+
+
+def runChunks(function, tasks, numberOfWorkers, measurements=None):
+    """
+    Runs a function for every chunk of families, distributed over several processes.
+    :param function: returns one value per family of a chunk (function)
+    :param tasks: arguments of the function per chunk, in the order of the families (list of tuples)
+    :param numberOfWorkers: number of processes (integer)
+    :param measurements: receives the measured phases and counters of all chunks, nothing is measured
+                         if None (Measurements)
+    :return: values of the function per family in the order of the families (generator)
+    """
+    if measurements is not None:
+        tasks = [(function,) + tuple(task) for task in tasks]
+        function = measuredChunk
+
+    def chunkValues(chunkResult):
+        if measurements is None:
+            return chunkResult
+        values, chunkMeasurements = chunkResult
+        measurements.add(chunkMeasurements)
+        return values
+
+    if numberOfWorkers == 1:
+        for task in tasks:
+            yield from chunkValues(function(*task))
+        return
+    with ProcessPoolExecutor(max_workers=numberOfWorkers) as executor:
+        # only about two chunks per process are in progress or waiting for their turn
+        for chunkResult in resultsInOrder(executor, function, tasks, 2 * numberOfWorkers):
+            yield from chunkValues(chunkResult)
+
+
+class PedigreeCache:
+    """
+    Simulated families saved per combination of demographic parameters and seed, so that a new aimList
+    (or a changed branch rule) can be analysed without simulating the families again.
+    An ensemble with more families or generations than needed is used as well, because the random stream of each
+    family only depends on the seed and the number of the family.
+    If the ensembles need more than maxBytes, the ones not used for the longest time are deleted.
+    """
+
+    def __init__(self, directory, maxBytes):
+        """
+        :param directory: directory of the cache (string)
+        :param maxBytes: maximum size of all ensembles in bytes (integer)
+        """
+        self.directory = directory
+        self.maxBytes = maxBytes
+        os.makedirs(directory, exist_ok=True)
+
+    def ensemble(self, sampler, numberOfSimulatedFamilies, maxGeneration, numberOfWorkers=1, measurements=None):
+        """
+        Returns the cached ensemble of the sampler, the families are simulated and saved first if it is missing
+        or too small.
+        :param sampler: sampler of the simulation (OffspringSampler)
+        :param numberOfSimulatedFamilies: number of families needed (integer)
+        :param maxGeneration: number of generations needed (integer)
+        :param numberOfWorkers: number of processes for the simulation, None for one per processor core (integer)
+        :param measurements: receives the measured phases and counters of the simulation, nothing is measured
+                             if None (Measurements)
+        :return: saved families (Ensemble)
+        """
+        key = ensembleKey(sampler)
+        directory = os.path.join(self.directory, key)
+        if os.path.exists(os.path.join(directory, "ensemble.json")):
+            ensemble = Ensemble(directory)
+            if ensemble.numberOfFamilies >= numberOfSimulatedFamilies and ensemble.maxGeneration >= maxGeneration:
+                logger.info("Families loaded from the cache: %s", key)
+                self.touch(directory)
+                return ensemble
+            # a larger ensemble replaces the old one
+            numberOfSimulatedFamilies = max(numberOfSimulatedFamilies, ensemble.numberOfFamilies)
+            maxGeneration = max(maxGeneration, ensemble.maxGeneration)
+            del ensemble
+
+        logger.info("Families are simulated for the cache: %s", key)
+        if numberOfWorkers is None:
+            numberOfWorkers = os.cpu_count() or 1
+        chunkSize = defaultChunkSize(numberOfSimulatedFamilies, numberOfWorkers)
+        tasks = [(sampler, firstFamily, lastFamily, maxGeneration)
+                 for firstFamily, lastFamily in familyChunks(numberOfSimulatedFamilies, chunkSize)]
+        with writtenInOneStep(directory) as temporaryDirectory:
+            writer = EnsembleWriter(temporaryDirectory, maxGeneration,
+                                    {"key": key, "parameters": ensembleParameters(sampler)})
+            for pedigree in runChunks(simulatePedigrees, tasks, numberOfWorkers, measurements):
+                writer.add(pedigree)
+            writer.close()
+        self.touch(directory)
+        self.evict(keep=directory)
+        return Ensemble(directory)
+
+    def touch(self, directory):
+        """
+        Notes the use of an ensemble for the eviction.
+        """
+        os.utime(os.path.join(directory, "ensemble.json"), (time.time(), time.time()))
+
+    def entries(self):
+        """
+        :return: directory, time of the last use and size in bytes per ensemble (list of tuples)
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            directory = os.path.join(self.directory, name)
+            settingsPath = os.path.join(directory, "ensemble.json")
+            if not os.path.exists(settingsPath):
+                continue
+            size = sum(os.path.getsize(os.path.join(directory, file)) for file in os.listdir(directory))
+            entries.append((directory, os.path.getmtime(settingsPath), size))
+        return entries
+
+    def evict(self, keep=None):
+        """
+        Deletes the ensembles not used for the longest time until the cache is not larger than maxBytes.
+        :param keep: directory of an ensemble that is never deleted (string)
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry[1])
+        size = sum(entry[2] for entry in entries)
+        for directory, lastUse, entrySize in entries:
+            if size <= self.maxBytes:
+                break
+            if directory == keep:
+                continue
+            logger.info("Families removed from the cache: %s", os.path.basename(directory))
+            shutil.rmtree(directory)
+            size = size - entrySize
+
+
+def analyseEnsemble(ensemble, aimLists, results, numberOfSimulatedFamilies=None, maxGeneration=None,
+                    numberOfWorkers=1, chunkSize=None, measurements=None):
+    """
+    This function analyses saved families for one or more aimLists without simulating them again.
+    :param ensemble: saved families (Ensemble)
+    :param aimLists: number of individuals per location for each target, largest value first (list of lists)
+    :param results: receives the outcomes for each aimList in the order of the families
+                    (list of SimulationResult or ResultWriter)
+    :param numberOfSimulatedFamilies: number of families to analyse, None for all saved families (integer)
+    :param maxGeneration: number of generations to analyse, None for all saved generations (integer)
+    :param numberOfWorkers: number of processes, None for one per processor core (integer)
+    :param chunkSize: number of families per task, None for about four tasks per process, but at most maxChunkSize
+                      (integer)
+    :param measurements: receives the measured phases and counters of the analysis, nothing is measured
+                         if None (Measurements)
+    :return: results (list of SimulationResult or ResultWriter)
+    """
+    if numberOfSimulatedFamilies is None:
+        numberOfSimulatedFamilies = ensemble.numberOfFamilies
+    if maxGeneration is None:
+        maxGeneration = ensemble.maxGeneration
+    if numberOfWorkers is None:
+        numberOfWorkers = os.cpu_count() or 1
+    if chunkSize is None:
+        chunkSize = defaultChunkSize(numberOfSimulatedFamilies, numberOfWorkers)
+    tasks = [(ensemble.directory, firstFamily, lastFamily, maxGeneration, aimLists)
+             for firstFamily, lastFamily in familyChunks(numberOfSimulatedFamilies, chunkSize)]
+    for familyResults in runChunks(analyseFamilies, tasks, numberOfWorkers, measurements):
+        for result, familyResult in zip(results, familyResults):
+            result.add(familyResult)
+    return results
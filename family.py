@@ -0,0 +1,345 @@
+import logging
+
+import numpy as np
+
+from ancestry import AncestryIndex
+from instrumentation import phase
+from matcher import AimMatcher, BranchCounter
+from pedigree import initialPedigree
+
+# status outputs of the simulation, shown with logging level DEBUG
+logger = logging.getLogger(__name__)
+
+
+class FamilyResult:
+    """
+    Outcome of one simulated family.
+    Values that were not reached are "", as in the lists of the simulation.
+    """
+
+    def __init__(self, gen1, gen2, extinctGeneration, numberPerGenerationList, maleAduldNumberPerGenerationList):
+        """
+        :param gen1: relevant generation, after which there are enough branches (integer or "")
+        :param gen2: generation with enough people per branch (integer or "")
+        :param extinctGeneration: generation in which the family dies out (integer or "")
+        :param numberPerGenerationList: number of persons per generation, None if not collected (list)
+        :param maleAduldNumberPerGenerationList: number of adult males per generation, None if not collected (list)
+        """
+        self.gen1 = gen1
+        self.gen2 = gen2
+        self.extinctGeneration = extinctGeneration
+        self.numberPerGenerationList = numberPerGenerationList
+        self.maleAduldNumberPerGenerationList = maleAduldNumberPerGenerationList
+
+
+class SimulationResult:
+    """
+    Lists of the simulation, filled family by family in the order of the families.
+    """
+
+    def __init__(self):
+        self.gen1List = []  # List of the number of relevant generations (after how many generations there are enough branches)
+        self.gen2List = []  # generation with enough people per branch
+        # branches sometimes die out when there are no male offspring left
+        # for verification serves list with number of generations after branches died out
+        self.extinctGenerationList = []
+        # list of lists about the number of (male) persons per simulated generation
+        # for each simulated family there is a list
+        self.numberPerGenerationListList = []
+        self.maleAduldNumberPerGenerationListList = []
+
+    def add(self, familyResult):
+        """
+        :param familyResult: outcome of the next family (FamilyResult)
+        """
+        if familyResult.gen1 != "":
+            self.gen1List.append(familyResult.gen1)
+            self.gen2List.append(familyResult.gen2)
+        # only include the dying generations if the family is really extinct
+        if familyResult.extinctGeneration != "":
+            self.extinctGenerationList.append(familyResult.extinctGeneration)
+        # lists per generation are only there if the statistics were collected
+        if familyResult.numberPerGenerationList is not None:
+            self.numberPerGenerationListList.append(familyResult.numberPerGenerationList)
+            self.maleAduldNumberPerGenerationListList.append(familyResult.maleAduldNumberPerGenerationList)
+
+
+class TargetCheck:
+    """
+    Checks after each simulated generation whether there are enough branches and enough people per branch.
+    The check only looks at generations that are already simulated, so it can run while the family is still growing.
+    Several aimLists with the same number of locations can be checked at once, they share the branches.
+    """
+
+    def __init__(self, aimList, *moreAimLists):
+        """
+        :param aimList: number of individuals per location, largest value first (list)
+        :param moreAimLists: further aimLists with the same number of locations (lists)
+        """
+        self.aimLists = [aimList] + list(moreAimLists)
+        # number of branches required results from the number of locations
+        self.neededBranches = len([element for element in aimList if element != 0])
+        if self.neededBranches < 2:
+            raise ValueError("Error: aimList needs at least two locations")
+        for otherAimList in moreAimLists:
+            if len([element for element in otherAimList if element != 0]) != self.neededBranches:
+                raise ValueError("Error: All aimLists of a check need the same number of locations")
+        self.matcher = AimMatcher(self.aimLists)
+
+        # initialization of a value for the relevant generation
+        # number of generations after which the target state is reached
+        self.relevantGeneration = ""
+
+        # generation with enough people per branch, for each aimList
+        self.gen2List = [""] * len(self.aimLists)
+
+        # indices of all males (array per generation)
+        self.branchListOverall = []
+        # number of adult males per branch, continued generation by generation
+        self.branchCounter = None
+        # next generation to compare with the aimList
+        self.nextGeneration = ""
+
+    @property
+    def gen1(self):
+        """
+        Number of relevant generations of the first aimList, "" as long as it is not reached.
+        """
+        return self.targetGenerations(0)[0]
+
+    @property
+    def gen2(self):
+        """
+        Generation with enough people per branch of the first aimList.
+        """
+        return self.gen2List[0]
+
+    @property
+    def decided(self):
+        return "" not in self.gen2List
+
+    def targetGenerations(self, target):
+        """
+        :param target: position of the aimList (integer)
+        :return: gen1 and gen2 of the aimList, "" if not reached (tuple)
+        """
+        gen2 = self.gen2List[target]
+        if gen2 == "":
+            return "", ""
+        return self.relevantGeneration, gen2
+
+    def update(self, pedigree, ancestry, generation):
+        """
+        This function continues the check with a newly simulated generation.
+        :param pedigree: simulated family, at least up to the generation (Pedigree)
+        :param ancestry: index of the pedigree, only needed as long as relevantGeneration is "" (AncestryIndex)
+        :param generation: last simulated generation (integer)
+        :return: True as soon as the generation with enough people per branch is found (boolean)
+        """
+        # execute only if relevantGeneration has no suitable value yet
+        if self.relevantGeneration == "":
+            # indices of the adult men of one generation
+            # exclude early deceased, female or persons of other generation
+            with phase("branchCollection"):
+                branchList = pedigree.adultMales(generation)
+
+            self.branchListOverall.append(branchList)  # per generation an array with the indices
+
+            # the ancestor of the initial person stays unknown (-1)
+            # now if several people have the same ancestor within four generations, they are recognized as one branch
+            self.enoughBranches(generation, len(branchList), lambda: len(np.unique(ancestry.ancestors(branchList, 4))))
+
+        # checking which generation outperforms the aimList
+        # only if relevantGeneration is not "", otherwise there is no start generation yet
+        if self.relevantGeneration == "" or self.decided:
+            return self.decided
+
+        with phase("aimListMatching"):
+            if self.branchCounter is None:
+                # must use the branchList four generations before, not the last one
+                # (position relevantGeneration of branchListOverall, i.e. generation relevantGeneration + 1)
+                self.branchCounter = BranchCounter(pedigree, self.branchListOverall[self.relevantGeneration],
+                                                   self.relevantGeneration + 1)
+                self.branchListOverall = []
+            # generations iterate, all generations up to the last simulated one
+            for gen in range(self.nextGeneration, generation + 1):
+                self.nextGeneration = gen + 1
+                # number of adult males of the generation descended from each branch
+                if self.matchesAim(self.branchCounter.counts(gen), gen):
+                    break
+        return self.decided
+
+    def enoughBranches(self, generation, numberOfAdultMales, countFathersBefore):
+        """
+        This function checks whether a generation has enough branches and sets relevantGeneration if so.
+        From generation 4 it is checked how many branches there are, a branch here can be a male person with descendants.
+        There must be at least x (neededBranches) many branches representing each location.
+        :param generation: generation of the adult males (integer)
+        :param numberOfAdultMales: number of adult males in the generation (integer)
+        :param countFathersBefore: returns the number of different progenitors of these males four generations before,
+                                   only called if there are enough adult males (function)
+        :return: True if there are enough branches (boolean)
+        """
+        logger.debug("Number of adult males (in generation): %d (%d)", numberOfAdultMales, generation)
+
+        # checking whether there are enough branches in one generation
+        if numberOfAdultMales < self.neededBranches:
+            return False
+        # checking whether there were four branches four generations before
+        # this must be done to prevent branches die out
+        # check if there are still more than ten branches present
+        with phase("fathersBefore"):
+            numberOfFathersBefore = countFathersBefore()
+        if numberOfFathersBefore < self.neededBranches:
+            return False
+        # relevantGeneration describes the generation in which enough branches have been simulated
+        self.relevantGeneration = generation
+        logger.debug("Relevant generation (enough branches available): %d", self.relevantGeneration)
+        # now subtract four generation from this
+        self.relevantGeneration = self.relevantGeneration - 4
+        self.nextGeneration = self.relevantGeneration
+        return True
+
+    def matchesAim(self, branchCounts, gen):
+        """
+        This function compares the number of adult males per branch in one generation with the aimLists
+        and sets gen2 of each aimList at its first hit.
+        The largest number has to reach the first element of the aimList, the second largest the second and so on.
+        :param branchCounts: number of adult males of the generation per branch (numpy array)
+        :param gen: generation of the adult males (integer)
+        :return: True if the generation decides the last open aimList (boolean)
+        """
+        matches = self.matcher.matches(branchCounts)
+        logger.debug("List element not yet larger than aimList in generation %d", gen)
+        # the lists are only created for the output if it is shown
+        if logger.isEnabledFor(logging.DEBUG) and len(branchCounts) > 0 and max(branchCounts) != 0:
+            logger.debug("Generation list %d : %s", gen, self.matcher.largest(branchCounts).tolist())
+            logger.debug("Target list: %s", self.aimLists[0][0:self.neededBranches])
+
+        for target in np.flatnonzero(matches):
+            if self.gen2List[target] == "":
+                self.gen2List[target] = gen
+                logger.debug("Relevant Generation (enough branches): %d", self.relevantGeneration)
+                logger.debug("Generation with enough people per branch: %d", gen)
+        return self.decided
+
+
+def extinctGenerationOfAdultMales(sampler, numberOfAdultMales, generation, maxGeneration):
+    """
+    This function continues a family only on the total number of adult males, to find out whether and when it dies
+    out without simulating the persons. The draws have the same distribution as in the simulation of the persons.
+    :param sampler: source of the random numbers (OffspringSampler)
+    :param numberOfAdultMales: number of adult males of the last simulated generation (integer)
+    :param generation: last simulated generation (integer)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :return: generation in which the family dies out, "" if it survives maxGeneration (integer or "")
+    """
+    adultMales = np.array([numberOfAdultMales])
+    for gen in range(generation + 1, maxGeneration + 1):
+        numberOfChildren = sampler.childrenOfGroups(sampler.fathersAmong(adultMales))
+        if numberOfChildren.sum() == 0:
+            return gen
+        adultMales = sampler.adultMaleChildren(numberOfChildren)
+    return ""
+
+
+def simulateFamily(sampler, maxGeneration, aimList, collectStatistics=True):
+    """
+    This function simulates one family generation by generation and checks after each generation
+    whether the target structure is reached.
+    Without statistics the persons are no longer simulated as soon as the outcome is decided,
+    i.e. the generation with enough people per branch is found or the family died out. Afterwards only the
+    number of adult males is continued, so the generation of dying out is still known.
+    :param sampler: source of the random properties of the persons (OffspringSampler)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :param aimList: number of individuals per location, largest value first (list)
+    :param collectStatistics: simulate all generations for the lists per generation (boolean)
+    :return: outcome of the family, without statistics the lists per generation are None (FamilyResult)
+    """
+    # people generation
+    # the person with index i has the ID i + 1, the initial person (index 0) has no father (-1)
+    pedigree = initialPedigree()
+    check = TargetCheck(aimList)
+    for generation in range(1, maxGeneration + 1):
+        with phase("personGeneration"):
+            newPersons = pedigree.addGeneration(sampler)
+        if not check.decided:
+            # the ancestors are only needed until there are enough branches
+            ancestry = None
+            if check.relevantGeneration == "":
+                with phase("ancestryIndex"):
+                    ancestry = AncestryIndex(pedigree)
+            check.update(pedigree, ancestry, generation)
+        if not collectStatistics and (check.decided or newPersons == 0):
+            break
+    logger.debug("Persons were generated")
+
+    if not collectStatistics:
+        extinctGeneration = pedigree.extinctGeneration()
+        if extinctGeneration == "":
+            lastGeneration = pedigree.maxGeneration
+            extinctGeneration = extinctGenerationOfAdultMales(sampler, len(pedigree.adultMales(lastGeneration)),
+                                                              lastGeneration, maxGeneration)
+        return FamilyResult(check.gen1, check.gen2, extinctGeneration, None, None)
+    return familyResult(pedigree, check)
+
+
+def analyseFamily(pedigree, aimList):
+    """
+    This function checks in which generation there are enough branches and enough people per branch.
+    :param pedigree: completely simulated family (Pedigree)
+    :param aimList: number of individuals per location, largest value first (list)
+    :return: outcome of the family (FamilyResult)
+    """
+    check = TargetCheck(aimList)
+    # ancestors and descendants are looked up in the index instead of walking from father to father
+    with phase("ancestryIndex"):
+        ancestry = AncestryIndex(pedigree)
+    # iterate generations
+    for generation in range(1, pedigree.maxGeneration + 1):
+        if check.update(pedigree, ancestry, generation):
+            break
+    return familyResult(pedigree, check)
+
+
+def analyseFamilyTargets(pedigree, aimLists):
+    """
+    This function checks one family against several aimLists, e.g. different configurations of the locations.
+    aimLists with the same number of locations share the branches and are compared at once.
+    :param pedigree: completely simulated family (Pedigree)
+    :param aimLists: number of individuals per location for each target, largest value first (list of lists)
+    :return: outcome of the family for each aimList (list of FamilyResult)
+    """
+    with phase("ancestryIndex"):
+        ancestry = AncestryIndex(pedigree)
+    # positions of the aimLists per number of locations
+    groups = {}
+    for position, aimList in enumerate(aimLists):
+        groups.setdefault(len([element for element in aimList if element != 0]), []).append(position)
+
+    familyResults = [None] * len(aimLists)
+    for positions in groups.values():
+        check = TargetCheck(*[aimLists[position] for position in positions])
+        for generation in range(1, pedigree.maxGeneration + 1):
+            if check.update(pedigree, ancestry, generation):
+                break
+        for target, position in enumerate(positions):
+            familyResults[position] = familyResult(pedigree, check, target)
+    return familyResults
+
+
+def familyResult(pedigree, check, target=0):
+    """
+    :param pedigree: completely simulated family (Pedigree)
+    :param check: finished check of the family (TargetCheck)
+    :param target: position of the aimList in the check (integer)
+    :return: outcome of the family (FamilyResult)
+    """
+    # family analysis
+    with phase("familyAnalysis"):
+        numberPerGenerationList = pedigree.numberPerGeneration().tolist()
+        maleAduldNumberPerGenerationList = pedigree.maleAdultNumberPerGeneration().tolist()
+        extinctGeneration = pedigree.extinctGeneration()  # generation in which the family dies out
+
+    gen1, gen2 = check.targetGenerations(target)
+    return FamilyResult(gen1, gen2, extinctGeneration, numberPerGenerationList, maleAduldNumberPerGenerationList)
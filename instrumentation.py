@@ -0,0 +1,101 @@
+import json
+import time
+from contextlib import contextmanager
+
+# measurements of this process, None while nothing is measured
+# each worker process measures its own chunks, the runner adds them up
+active = None
+
+
+class Measurements:
+    """
+    Time per phase of the simulation, how often each phase was run and counters
+    (persons generated, fathers processed, ancestor steps walked, ...).
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self.counters = {}
+
+    def addTime(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def add(self, other):
+        """
+        :param other: measurements of another process or chunk (Measurements)
+        """
+        for name, seconds in other.seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + other.calls[name]
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        """
+        :return: phases with seconds and number of calls, and the counters (dictionary)
+        """
+        return {"phases": {name: {"seconds": self.seconds[name], "calls": self.calls[name]} for name in self.seconds},
+                "counters": dict(self.counters)}
+
+
+class phase:
+    """
+    Measures the time of a phase while measurements are collected, e.g. with phase("personGeneration"): ...
+    Without active measurements it only costs the creation of the object.
+    """
+
+    __slots__ = ["name", "start"]
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if active is not None:
+            self.start = time.perf_counter()
+
+    def __exit__(self, *exception):
+        if active is not None:
+            active.addTime(self.name, time.perf_counter() - self.start)
+
+
+def count(name, value=1):
+    """
+    :param name: name of the counter (string)
+    :param value: amount added to the counter (integer)
+    """
+    if active is not None:
+        active.count(name, value)
+
+
+@contextmanager
+def collect():
+    """
+    Collects the measurements of the enclosed code.
+    :return: collected measurements (Measurements)
+    """
+    global active
+    previous = active
+    active = Measurements()
+    try:
+        yield active
+    finally:
+        active = previous
+
+
+def writeSummary(path, measurements, seconds, parameters):
+    """
+    Writes the summary of a run as JSON file.
+    :param path: path of the file (string)
+    :param measurements: measurements of the run (Measurements)
+    :param seconds: duration of the whole run (float)
+    :param parameters: parameters of the run (dictionary)
+    """
+    summary = {"parameters": parameters, "seconds": seconds}
+    summary.update(measurements.summary())
+    with open(path, 'w') as file:
+        json.dump(summary, file, indent=1)
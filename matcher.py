@@ -0,0 +1,96 @@
+import numpy as np
+
+import instrumentation
+
+
+class AimMatcher:
+    """
+    Compares the number of adult males per branch with one or more target structures (aimLists) at once.
+    The numbers per branch are sorted descending and compared position by position with each aimList,
+    positions missing in an aimList count as 0, so the aimLists do not have to be filled with zeros.
+    """
+
+    def __init__(self, aimLists):
+        """
+        :param aimLists: number of individuals per location for each target, largest value first (list of lists)
+        """
+        # zeros at the end of an aimList are not needed for the comparison
+        trimmed = []
+        for aimList in aimLists:
+            aimList = list(aimList)
+            while aimList and aimList[-1] == 0:
+                aimList.pop()
+            trimmed.append(aimList)
+        # one row per target, filled with zeros up to the longest target
+        self.width = max([len(aimList) for aimList in trimmed] + [0])
+        self.targets = np.zeros((len(trimmed), self.width), dtype=np.int64)
+        for row, aimList in enumerate(trimmed):
+            self.targets[row, :len(aimList)] = aimList
+
+    def largest(self, counts):
+        """
+        :param counts: number of adult males per branch (numpy array)
+        :return: the largest numbers in descending order, filled with zeros to the width of the targets (numpy array)
+        """
+        counts = np.asarray(counts, dtype=np.int64)
+        top = np.zeros(self.width, dtype=np.int64)
+        size = min(self.width, len(counts))
+        if size < len(counts):
+            # only the largest values are sorted, not all branches
+            counts = np.partition(counts, len(counts) - size)[len(counts) - size:]
+        top[:size] = np.sort(counts)[::-1]
+        return top
+
+    def matches(self, counts):
+        """
+        A generation fits a target if it has at least as many adult males per branch at every position
+        and at least one adult male in a branch.
+        :param counts: number of adult males per branch (numpy array)
+        :return: True for every target the generation fits (numpy array)
+        """
+        counts = np.asarray(counts)
+        if len(counts) == 0 or counts.max() == 0:
+            return np.zeros(len(self.targets), dtype=bool)
+        return (self.largest(counts) >= self.targets).all(axis=1)
+
+
+class BranchCounter:
+    """
+    Number of adult male descendants per branch, continued generation by generation.
+    Every person of the last counted generation carries the number of the branch it descends from (-1 for none),
+    a new generation takes over the branch of the fathers, so earlier generations are never walked again.
+    """
+
+    def __init__(self, pedigree, branches, branchGeneration):
+        """
+        :param pedigree: simulated family, may still grow (Pedigree)
+        :param branches: indices of the adult males of one generation (numpy array)
+        :param branchGeneration: generation of the branches (integer)
+        """
+        self.pedigree = pedigree
+        self.numberOfBranches = len(branches)
+        self.branchGeneration = branchGeneration
+        part = pedigree.generationSlice(self.branchGeneration)
+        self.branchOf = np.full(part.stop - part.start, -1, dtype=np.int64)
+        self.branchOf[np.asarray(branches) - part.start] = np.arange(len(branches))
+        self.generation = self.branchGeneration
+
+    def counts(self, generation):
+        """
+        The generations must be requested in ascending order.
+        :param generation: generation of the counted descendants (integer)
+        :return: number of adult males of the generation descended from each branch (numpy array)
+        """
+        pedigree = self.pedigree
+        if generation <= self.branchGeneration:
+            # nobody is counted as descendant of himself
+            return np.zeros(self.numberOfBranches, dtype=np.int64)
+        while self.generation < generation:
+            fatherStart = pedigree.generationSlice(self.generation).start
+            self.generation = self.generation + 1
+            part = pedigree.generationSlice(self.generation)
+            self.branchOf = self.branchOf[pedigree.father[part] - fatherStart]
+            instrumentation.count("ancestorSteps", len(self.branchOf))
+        part = pedigree.generationSlice(generation)
+        adultMale = (pedigree.sex[part] == 0) & (pedigree.earlyDeath[part] == 0) & (self.branchOf >= 0)
+        return np.bincount(self.branchOf[adultMale], minlength=self.numberOfBranches)
@@ -0,0 +1,202 @@
+import csv
+import glob
+import json
+import os
+import shutil
+from contextlib import contextmanager
+
+import numpy as np
+
+from accumulator import GenerationAccumulator
+
+
+def determineGen3List(gen1List, gen2List):
+    """
+    This function determines the previous generations: gen1, but at most four generations before gen2.
+    :param gen1List: relevant generations (list)
+    :param gen2List: generations with enough people per branch (list)
+    :return: previous generations (list)
+    """
+    gen3List = []
+    for position, element in enumerate(gen1List):
+        # comparison how big the distance is
+        difference = gen2List[position] - element
+        if difference <= 4:
+            gen3List.append(element)
+        else:
+            gen3List.append(gen2List[position] - 4)
+    return gen3List
+
+
+def writeList(filename, values):
+    """
+    Writes a list as CSV file with one column and without heading.
+    :param filename: path of the file (string)
+    :param values: values of the column (list)
+    """
+    with open(filename, 'w', newline='') as csvWriter:
+        writer = csv.writer(csvWriter)
+        for element in values:
+            writer.writerow([element])
+
+
+def writeResultFiles(result, scenario, directory="."):
+    """
+    Outputs the contents of the gen1list, gen2list, gen3list, and extinctGenerationList lists of a scenario.
+    :param result: lists of the simulation (SimulationResult)
+    :param scenario: name of the scenario, part of the file names (string)
+    :param directory: directory of the files (string)
+    """
+    writeList(os.path.join(directory, "gen1list-" + scenario + ".csv"), result.gen1List)
+    writeList(os.path.join(directory, "gen2list-" + scenario + ".csv"), result.gen2List)
+    writeList(os.path.join(directory, "gen3list-" + scenario + ".csv"),
+              determineGen3List(result.gen1List, result.gen2List))
+    writeList(os.path.join(directory, "extinctGenerationList-" + scenario + ".csv"),
+              sorted(result.extinctGenerationList))
+
+
+@contextmanager
+def writtenInOneStep(path):
+    """
+    Context for writing a file or a directory under a temporary name, which is renamed to path at the end.
+    An interruption never leaves a half written file, a leftover of an interrupted run is deleted.
+    :param path: path of the file or directory (string)
+    :return: temporary path to write to, with the same extension as path (string)
+    """
+    root, extension = os.path.splitext(path)
+    temporaryPath = root + ".tmp" + extension
+    if os.path.isdir(temporaryPath):
+        shutil.rmtree(temporaryPath)
+    yield temporaryPath
+    if os.path.isdir(temporaryPath) and os.path.isdir(path):
+        shutil.rmtree(path)
+    os.replace(temporaryPath, path)
+
+
+class ResultWriter:
+    """
+    Writes the outcome of each family to disk as soon as it is added, instead of collecting all lists in memory.
+    The outcomes are buffered and saved in parts (results-<scenario>-00000.npz, ...), values that were not reached
+    are saved as -1. The numbers per generation are folded into running statistics (GenerationAccumulator) part by
+    part, so the memory does not grow with the number of families. close() exports the parts to the usual CSV files
+    and the statistics to generationStatistics-<scenario>.json.
+    Can be used instead of SimulationResult, e.g. in runFamilies.
+    """
+
+    # columns of the parts with one value per family
+    columns = ["family", "gen1", "gen2", "extinctGeneration"]
+
+    def __init__(self, directory, scenario, maxGeneration, bufferSize=1000):
+        """
+        :param directory: directory of the parts and CSV files (string)
+        :param scenario: name of the scenario, part of the file names (string)
+        :param maxGeneration: number of simulated generations (integer)
+        :param bufferSize: number of families per part (integer)
+        """
+        self.directory = directory
+        self.scenario = scenario
+        self.maxGeneration = maxGeneration
+        self.bufferSize = bufferSize
+        os.makedirs(directory, exist_ok=True)
+        # parts of an earlier run with the same name are replaced
+        for path in self.partPaths():
+            os.remove(path)
+
+        self.numberOfFamilies = 0
+        self.numberOfParts = 0
+        self.buffer = []
+
+        # running statistics per generation of all saved families
+        self.statistics = GenerationAccumulator(maxGeneration)
+
+    @property
+    def numberOfFamiliesWithStatistics(self):
+        return self.statistics.numberOfFamiliesWithStatistics
+
+    def add(self, familyResult):
+        """
+        :param familyResult: outcome of the next family (FamilyResult)
+        """
+        self.buffer.append(familyResult)
+        self.numberOfFamilies = self.numberOfFamilies + 1
+        if len(self.buffer) >= self.bufferSize:
+            self.flush()
+
+    def flush(self):
+        """
+        Saves the buffered families as a new part and adds them to the statistics.
+        """
+        if not self.buffer:
+            return
+        self.statistics.add(self.buffer)
+        firstFamily = self.numberOfFamilies - len(self.buffer)
+        values = {"family": np.arange(firstFamily, self.numberOfFamilies, dtype=np.int64)}
+        for name in ["gen1", "gen2", "extinctGeneration"]:
+            values[name] = np.array([-1 if getattr(familyResult, name) == "" else getattr(familyResult, name)
+                                     for familyResult in self.buffer], dtype=np.int16)
+        path = os.path.join(self.directory, "results-" + self.scenario + "-" + str(self.numberOfParts).zfill(5) + ".npz")
+        with writtenInOneStep(path) as temporaryPath:
+            np.savez(temporaryPath, **values)
+        self.numberOfParts = self.numberOfParts + 1
+        self.buffer = []
+
+    def partPaths(self):
+        """
+        :return: paths of the saved parts in the order of the families (list)
+        """
+        return sorted(glob.glob(os.path.join(glob.escape(self.directory),
+                                             "results-" + glob.escape(self.scenario) + "-[0-9][0-9][0-9][0-9][0-9].npz")))
+
+    def parts(self):
+        """
+        Loads the saved parts one after another.
+        :return: columns of each part (generator of dictionaries of numpy arrays)
+        """
+        for path in self.partPaths():
+            with np.load(path) as part:
+                yield {name: part[name] for name in self.columns}
+
+    def column(self, name):
+        """
+        :param name: "gen1", "gen2" or "extinctGeneration" (string)
+        :return: values of all families that reached it, in the order of the families (numpy array)
+        """
+        values = [part[name][part[name] >= 0] for part in self.parts()]
+        return np.concatenate(values) if values else np.zeros(0, dtype=np.int16)
+
+    def averageNumberPerGeneration(self):
+        """
+        :return: average number of persons per generation (numpy array)
+        """
+        return self.statistics.persons.mean
+
+    def averageMaleAduldNumberPerGeneration(self):
+        """
+        :return: average number of adult males per generation (numpy array)
+        """
+        return self.statistics.adultMales.mean
+
+    def close(self):
+        """
+        Saves the remaining families and outputs the gen1list, gen2list, gen3list and extinctGenerationList CSV files
+        and the statistics per generation.
+        """
+        self.flush()
+        with open(os.path.join(self.directory, "gen1list-" + self.scenario + ".csv"), 'w', newline='') as gen1File, \
+                open(os.path.join(self.directory, "gen2list-" + self.scenario + ".csv"), 'w', newline='') as gen2File, \
+                open(os.path.join(self.directory, "gen3list-" + self.scenario + ".csv"), 'w', newline='') as gen3File:
+            gen1Writer = csv.writer(gen1File)
+            gen2Writer = csv.writer(gen2File)
+            gen3Writer = csv.writer(gen3File)
+            for part in self.parts():
+                reached = part["gen1"] >= 0
+                gen1List = part["gen1"][reached].tolist()
+                gen2List = part["gen2"][reached].tolist()
+                gen1Writer.writerows([element] for element in gen1List)
+                gen2Writer.writerows([element] for element in gen2List)
+                gen3Writer.writerows([element] for element in determineGen3List(gen1List, gen2List))
+        # sorted by generation, written from the number of families per generation
+        writeList(os.path.join(self.directory, "extinctGenerationList-" + self.scenario + ".csv"),
+                  np.repeat(np.arange(self.maxGeneration + 1), self.statistics.extinctCounts).tolist())
+        with open(os.path.join(self.directory, "generationStatistics-" + self.scenario + ".json"), 'w') as file:
+            json.dump(self.statistics.summary(), file)
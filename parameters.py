@@ -0,0 +1,158 @@
+import json
+
+from sampler import OffspringSampler
+
+
+class SimulationParameters:
+    """
+    All parameters of a simulation run. Every value has a default, single values can be passed by name,
+    e.g. SimulationParameters(loc=2, maxGeneration=15), or read from a JSON file with loadParameters.
+    """
+
+    def __init__(self, **values):
+        """
+        :param values: parameters that differ from the defaults, named like the attributes
+        """
+        # definition of the scenario name (needed for the generation of the file names)
+        self.scenario = "B"
+
+        # number of families to simulate
+        self.numberOfSimulatedFamilies = 1000
+
+        # gender distribution in percent
+        self.sexRatioMale = 50
+        self.sexRatioFemale = 50
+
+        # infant mortality rate in percent
+        self.earlyDeathRatio = 40  # 20 # 40 # 50
+        self.earlyLifeRatio = 60  # 80 # 60 # 50
+
+        self.a = 6  # skewness of the distribution of children
+        self.loc = 3  # 2 # 3 # 4 # expected value of the number of children
+        self.scale = 6  # standard deviation of the number of children
+
+        # maximum number of generations to be simulated
+        # serves to limit the runtime
+        self.maxGeneration = 11  # 8 # 11 # 15
+
+        # definition of the existing structure of the families
+        # for each location a number of simulated individuals is entered
+        # locations that are not listed count as 0, several configurations can be compared with analyseFamilyTargets
+        self.aimList = [10, 6, 6, 6, 4, 4, 4, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2]
+
+        # definition of the proportion of persons with/without children
+        self.noChildlessRatio = 80
+        self.childlessRatio = 20
+
+        # seed of the random numbers, the same seed repeats a run exactly
+        # None gives a different result on every run
+        self.seed = None
+
+        # number of processes that simulate families in parallel
+        # None uses all processor cores
+        self.numberOfWorkers = None
+
+        # collect the number of persons and adult males per generation for all generations up to maxGeneration
+        # False stops simulating the persons of each family as soon as its outcome is decided (enough people per
+        # branch or died out), afterwards only the number of adult males is continued until the family dies out,
+        # this is much faster, but the graphs per generation are skipped
+        self.collectStatistics = True
+
+        # simulation of the families
+        # "individual" simulates every person, "counts" only the number of adult males per branch
+        # both give the same distributions, "counts" needs far less memory and allows more generations
+        # (maxGeneration 20 and more)
+        self.engine = "individual"
+
+        # scenario sweep: values per parameter, every combination is simulated as a scenario of its own
+        # e.g. {"earlyDeathRatio": [20, 40, 50], "loc": [2, 3, 4], "maxGeneration": [8, 11, 15]}
+        # the scenario names are put together from scenario and the values, e.g. "B-earlyDeathRatio20-loc2-maxGeneration8"
+        # finished chunks of families are saved in checkpointDirectory, a restarted sweep continues where it stopped
+        # None simulates only the scenario defined above (with graphs)
+        self.sweepGrid = None
+        self.checkpointDirectory = "checkpoints"
+
+        # directory of the output files
+        # the outcome of each family is saved there in parts (results-<scenario>-00000.npz, ...) while the simulation
+        # runs, the CSV files are written as soon as all families are simulated
+        self.resultDirectory = "."
+
+        # directory of the graphs (PNG files), None draws no graphs
+        self.plotDirectory = None
+
+        # level of the status outputs: "WARNING" shows only problems, "INFO" the progress of a sweep,
+        # "DEBUG" every generation of every family (slow for many families)
+        self.logLevel = "WARNING"
+
+        # measure the time of the phases of the simulation (person generation, branch check, comparison with the
+        # aimList, ...) and count persons, fathers and ancestor steps, the summary is written to
+        # instrumentation-<scenario>.json in resultDirectory
+        self.instrumentationEnabled = False
+
+        # cache of simulated families: with a directory, the families are saved once per combination of a, loc, scale,
+        # the ratios and seed, a run with a new aimList only analyses the saved families (needs a fixed seed)
+        # the ensembles not used for the longest time are deleted when the cache gets larger than pedigreeCacheSize
+        # bytes, the families are simulated person by person, engine is not used
+        self.pedigreeCacheDirectory = None
+        self.pedigreeCacheSize = 20 * 2 ** 30
+
+        # adaptive number of families: with a value (e.g. 0.01), the families are simulated in batches of batchSize
+        # until every bin of the gen1, gen2 and gen3 histograms and the extinction rate are known to +- targetPrecision
+        # (95 % confidence interval), numberOfSimulatedFamilies and maxSimulationSeconds are then only the budget
+        # the achieved precision is saved as precision-<scenario>.json in resultDirectory
+        self.targetPrecision = None
+        self.batchSize = 1000
+        self.maxSimulationSeconds = None
+
+        # True computes the expected values per generation from the generating functions instead of simulating
+        # families (within milliseconds, e.g. to screen parameters): dying out, persons, adult males and branches
+        self.analyticMode = False
+
+        # rare targets (large aimList, low fertility, few generations): with a splittingFactor (e.g. 3), families that
+        # have far more adult males than expected are copied splittingFactor times per level and continued with their
+        # own random streams, families far below are partly dropped, and the outcomes are weighted accordingly
+        # only the weighted histograms of gen1, gen2, gen3 and the dying out with their standard errors are saved
+        # (weightedHistograms-<scenario>.csv), the families are simulated with engine "counts"
+        # maxTrajectoriesPerFamily limits the number of copies of one family
+        self.splittingFactor = None
+        self.maxTrajectoriesPerFamily = 1000
+
+        for name, value in values.items():
+            if not hasattr(self, name):
+                raise ValueError("Error: Unknown parameter " + name)
+            setattr(self, name, value)
+
+    @property
+    def neededBranches(self):
+        """
+        Number of branches required results from the number of locations.
+        """
+        return len([element for element in self.aimList if element != 0])
+
+    def sampler(self):
+        """
+        :return: sampler with the demographic parameters and the seed (OffspringSampler)
+        """
+        return OffspringSampler(self.a, self.loc, self.scale, self.sexRatioMale, self.sexRatioFemale,
+                                self.earlyLifeRatio, self.earlyDeathRatio, self.noChildlessRatio, self.childlessRatio,
+                                seed=self.seed)
+
+    def scenarioParameters(self):
+        """
+        :return: parameters that determine the outcome of a scenario, as used by the sweep (dictionary)
+        """
+        names = ["numberOfSimulatedFamilies", "sexRatioMale", "sexRatioFemale", "earlyDeathRatio", "earlyLifeRatio",
+                 "a", "loc", "scale", "maxGeneration", "aimList", "noChildlessRatio", "childlessRatio", "seed",
+                 "collectStatistics", "engine"]
+        return {name: getattr(self, name) for name in names}
+
+
+def loadParameters(path):
+    """
+    Reads the parameters from a JSON file, e.g. {"scenario": "C", "loc": 2, "maxGeneration": 15}.
+    Parameters missing in the file keep their default values.
+    :param path: path of the file (string)
+    :return: parameters (SimulationParameters)
+    """
+    with open(path) as file:
+        return SimulationParameters(**json.load(file))
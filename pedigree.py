@@ -0,0 +1,141 @@
+import numpy as np
+
+import instrumentation
+
+
+class Pedigree:
+    """
+    Pedigree of one simulated family, stored as compact arrays instead of one dictionary per person.
+    The person with index i corresponds to the person with ID i + 1 of the former person list,
+    the initial person therefore has index 0 and no father (-1).
+    The persons of one generation are stored contiguously, generation g occupies the index range
+    generationOffsets[g] to generationOffsets[g + 1].
+    """
+
+    def __init__(self, father, sex, earlyDeath, childless, generationOffsets):
+        """
+        :param father: index of the father per person, -1 for the initial person (numpy array)
+        :param sex: 0 for male, 1 for female (numpy array)
+        :param earlyDeath: 0 if grown up, 1 if died as a child (numpy array)
+        :param childless: 0 if had children, 1 if remained childless (numpy array)
+        :param generationOffsets: start index per generation plus the total number of persons (numpy array)
+        """
+        self.father = father
+        self.sex = sex
+        self.earlyDeath = earlyDeath
+        self.childless = childless
+        self.generationOffsets = generationOffsets
+        self._generation = None
+
+    @property
+    def numberOfPersons(self):
+        return int(self.generationOffsets[-1])
+
+    @property
+    def maxGeneration(self):
+        return len(self.generationOffsets) - 2
+
+    @property
+    def generation(self):
+        """
+        Generation per person, only created on first access.
+        """
+        if self._generation is None:
+            self._generation = np.repeat(np.arange(self.maxGeneration + 1, dtype=np.int16),
+                                         self.numberPerGeneration())
+        return self._generation
+
+    def addGeneration(self, sampler):
+        """
+        Simulates the children of the last generation and appends them as a new generation.
+        :param sampler: source of the random properties of the persons (OffspringSampler)
+        :return: number of persons of the new generation (integer)
+        """
+        # identify possible fathers in the last generation (male and not died early)
+        last = self.generationSlice(self.maxGeneration)
+        candidates = np.flatnonzero((self.sex[last] == 0) & (self.earlyDeath[last] == 0)) + last.start
+        # the initial person had children in any case
+        if self.maxGeneration > 0:
+            self.childless[candidates] = sampler.childless(len(candidates))
+        fathers = candidates[self.childless[candidates] == 0]
+
+        # create children (number random)
+        numberOfChildren = sampler.numberOfChildren(len(fathers))
+        newPersons = int(numberOfChildren.sum())
+        instrumentation.count("fathers", len(fathers))
+        instrumentation.count("persons", newPersons)
+
+        self.father = np.concatenate([self.father, np.repeat(fathers, numberOfChildren).astype(np.int32)])
+        self.sex = np.concatenate([self.sex, sampler.sex(newPersons)])
+        self.earlyDeath = np.concatenate([self.earlyDeath, sampler.earlyDeath(newPersons)])
+        self.childless = np.concatenate([self.childless, np.zeros(newPersons, dtype=np.int8)])
+        self.generationOffsets = np.append(self.generationOffsets, self.generationOffsets[-1] + newPersons)
+        self._generation = None
+        return newPersons
+
+    def generationSlice(self, generation):
+        """
+        :param generation: generation (integer)
+        :return: index range of the persons of the generation (slice)
+        """
+        if generation < 0 or generation > self.maxGeneration:
+            return slice(0, 0)
+        return slice(int(self.generationOffsets[generation]), int(self.generationOffsets[generation + 1]))
+
+    def adultMaleMask(self):
+        """
+        :return: True for every male person who did not die early (numpy array)
+        """
+        return (self.sex == 0) & (self.earlyDeath == 0)
+
+    def adultMales(self, generation):
+        """
+        :param generation: generation (integer)
+        :return: indices of the adult males of the generation in ascending order (numpy array)
+        """
+        part = self.generationSlice(generation)
+        mask = (self.sex[part] == 0) & (self.earlyDeath[part] == 0)
+        return np.flatnonzero(mask) + part.start
+
+    def numberPerGeneration(self):
+        """
+        :return: number of persons per generation, generation 0 to maxGeneration (numpy array)
+        """
+        return np.diff(self.generationOffsets)
+
+    def maleAdultNumberPerGeneration(self):
+        """
+        :return: number of adult males per generation, generation 0 to maxGeneration (numpy array)
+        """
+        return np.bincount(self.generation, weights=self.adultMaleMask(),
+                           minlength=self.maxGeneration + 1).astype(np.int64)
+
+    def extinctGeneration(self):
+        """
+        :return: first generation without persons, "" if the family did not die out (integer or string)
+        """
+        empty = np.flatnonzero(self.numberPerGeneration() == 0)
+        if len(empty) == 0:
+            return ""
+        return int(empty[0])
+
+
+def initialPedigree():
+    """
+    :return: family consisting only of the initial person: male, not died as a child, had children (Pedigree)
+    """
+    return Pedigree(np.array([-1], dtype=np.int32), np.zeros(1, dtype=np.int8), np.zeros(1, dtype=np.int8),
+                    np.zeros(1, dtype=np.int8), np.array([0, 1], dtype=np.int64))
+
+
+def generatePedigree(maxGeneration, sampler):
+    """
+    This function simulates one family, generation by generation, starting with a single male progenitor.
+    :param maxGeneration: number of generations to be simulated (integer)
+    :param sampler: source of the random properties of the persons (OffspringSampler)
+    :return: simulated family (Pedigree)
+    """
+    pedigree = initialPedigree()
+    for generation in range(1, maxGeneration + 1):
+        pedigree.addGeneration(sampler)
+    return pedigree
@@ -0,0 +1,59 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def plotOutcome(outcome, directory, scenario):
+    """
+    This function saves the graphs of a simulation run as PNG files, e.g. gen3-B.png.
+    matplotlib is only imported here and draws without a window, so the simulation itself never needs it.
+    :param outcome: lists of the run (SimulationOutcome)
+    :param directory: directory of the PNG files (string)
+    :param scenario: name of the scenario, part of the file names (string)
+    :return: paths of the saved files (list)
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+
+    def save(name):
+        path = os.path.join(directory, name + "-" + scenario + ".png")
+        plt.savefig(path)
+        plt.close()
+        paths.append(path)
+        logger.info("Graph saved: %s", path)
+
+    # histograms
+    histograms = [("gen3", outcome.gen3List, "Generations"),
+                  ("gen1", outcome.gen1List, "Generationen"),  # enough branches
+                  ("gen2", outcome.gen2List, "Generationen")]  # enough branches with enough people
+    for name, values, label in histograms:
+        if not values:
+            continue
+        plt.hist(values, bins=(max(values) - min(values) + 1))
+        plt.xlabel(label)
+        plt.ylabel("Percentage share")
+        save(name)
+
+    if outcome.extinctGenerationList:
+        plt.plot(sorted(outcome.extinctGenerationList))
+        save("extinctGeneration")
+
+    # the numbers per generation only exist if the statistics were collected
+    if outcome.averageNumberPerGeneration is not None:
+        statistics = outcome.statistics
+        curves = [("numberPerGeneration", outcome.averageNumberPerGeneration, statistics.personSketch),
+                  ("maleAduldNumberPerGeneration", outcome.averageMaleAduldNumberPerGeneration,
+                   statistics.adultMaleSketch)]
+        for name, average, sketch in curves:
+            # average over all families, with the range of the middle 90 % of the families
+            generations = range(len(average))
+            plt.fill_between(generations, sketch.quantile(0.05), sketch.quantile(0.95), alpha=0.3)
+            plt.plot(generations, average)
+            plt.xlabel("Generations")
+            save(name)
+    return paths
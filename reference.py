@@ -0,0 +1,223 @@
+import random
+
+import numpy as np
+
+from family import FamilyResult, TargetCheck
+
+
+def simulateFamilyReference(sampler, maxGeneration, aimList, collectStatistics=True):
+    """
+    Original algorithm of the simulation (one dictionary per person, search in the list of persons),
+    kept unchanged as reference for benchmarks and for checking the faster simulations.
+    Only the status outputs are left out and the random numbers are seeded from the sampler.
+    :param sampler: parameters and random stream of the family (OffspringSampler)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :param aimList: number of individuals per location, largest value first (list)
+    :param collectStatistics: not used, the reference always simulates all generations (boolean)
+    :return: outcome of the family (FamilyResult)
+    """
+    from scipy.stats import skewnorm
+
+    # an invalid aimList is rejected as by the other engines
+    TargetCheck(aimList)
+    a = sampler.a
+    loc = sampler.loc
+    scale = sampler.scale
+    # stream of its own, independent of the streams of the other simulations with the same seed
+    seedSequence = sampler.seedSequence
+    seedSequence = np.random.SeedSequence(seedSequence.entropy, spawn_key=seedSequence.spawn_key + (0,))
+    randomState = np.random.Generator(np.random.PCG64(seedSequence))
+    randomChoice = random.Random(int(randomState.integers(0, 2 ** 63))).choice
+
+    def skewChilds(a, loc, scale):
+        return (skewnorm.rvs(a=a, loc=loc, scale=scale, size=1, random_state=randomState))
+
+    def ratioRandom(firstRatio, secondRatio):
+        values = [[0, 1], [firstRatio, secondRatio]]
+        randomValue = sum(([position] * value for position, value in zip(*values)), [])
+        return (randomChoice(randomValue))
+
+    # father and child assignment dictionary
+    fathersDict = {}  # key: id child, value: id father
+
+    # properties of the initial person are set
+    personList = [{"id": 1,  # father ID
+                   "idFather": 0,  # no father
+                   "generation": 0,  # generation 0
+                   "sex": 0,  # male
+                   "earlyDeath": 0,  # not died as a child
+                   "childless": 0,  # had children
+                   "aduldMaleChildrenList": []}]  # List of male children (list to be filled)
+
+    # father receives ID 1, other persons receive IDs starting from value 2
+    id = 2
+
+    # people generation
+    for generation in range(1, maxGeneration + 1):
+        for person in personList:
+            if person["generation"] == generation - 1:  # last generation
+                if person["sex"] == 0:  # fathers can only be male
+                    if person["earlyDeath"] == 0:  # fathers can not have died early
+                        if person["id"] != 1:
+                            person.update({"childless": ratioRandom(sampler.noChildlessRatio, sampler.childlessRatio)})
+                        if person["childless"] == 0:  # had children (0), had no children (1)
+                            idFather = person["id"]
+                            for child in range(int(round(skewChilds(a, loc, scale)[0], 0))):
+                                childDict = {}
+                                childDict.update({"id": id})
+                                childDict.update({"idFather": idFather})
+                                childDict.update({"generation": generation})
+                                childDict.update({"sex": ratioRandom(sampler.sexRatioMale, sampler.sexRatioFemale)})
+                                childDict.update({"earlyDeath": ratioRandom(sampler.earlyLifeRatio,
+                                                                            sampler.earlyDeathRatio)})
+                                childDict.update({"aduldMaleChildrenList": []})
+                                personList.append(childDict)  # add person
+                                fathersDict.update({id: idFather})  # add father and child dictionary
+                                id = id + 1  # count up ID, as this is not to be assigned twice
+
+                                if childDict["sex"] == 0 and childDict["earlyDeath"] == 0:
+                                    personList[childDict["idFather"]]["aduldMaleChildrenList"].append(id)
+
+    return analyseReference(personList, fathersDict, maxGeneration, aimList)
+
+
+def analyseReference(personList, fathersDict, maxGeneration, aimList):
+    """
+    Original analysis of a family (search in the list of persons), kept unchanged as reference for checking
+    the faster analysis.
+    :param personList: one dictionary per person with id, idFather, generation, sex and earlyDeath (list)
+    :param fathersDict: id of the father per id of a child (dictionary)
+    :param maxGeneration: number of simulated generations (integer)
+    :param aimList: number of individuals per location, largest value first (list)
+    :return: outcome of the family (FamilyResult)
+    """
+    # number of branches required results from the number of locations
+    aimListWithout0 = []
+    for element in aimList:
+        if element != 0:
+            aimListWithout0.append(element)
+    neededBranches = len(aimListWithout0)
+
+    relevantGeneration = ""
+    gen1 = ""  # number of relevant generations
+    gen2 = ""  # generation with enough people per branch
+
+    # IDs of all males (list per generation)
+    branchListOverall = []
+
+    # iterate generations
+    for generation in range(1, maxGeneration + 1):
+        if relevantGeneration == "":
+            personCounter = 0  # number of men in a generation
+            branchList = []  # IDs of men of one generation
+
+            # adult men of a generation count
+            for p in personList:
+                if p["earlyDeath"] != 0 or p["sex"] != 0 or p["generation"] != generation:
+                    continue
+                personCounter = personCounter + 1  # count up
+                branchList.append(p["id"])  # save ID
+
+            branchListOverall.append(branchList)  # per generation a list with the IDs
+
+            if len(branchList) >= neededBranches:
+                fathersBefore = []
+                for idCheck in branchList:
+                    for prevoiusGen in range(1, 5):  # four generations
+                        for p in personList:
+                            if p["id"] == idCheck:
+                                idCheck = p["idFather"]
+                                break
+                    fathersBefore.append(idCheck)
+                fathersBefore = set(fathersBefore)
+                if len(fathersBefore) >= neededBranches:
+                    relevantGeneration = generation
+                    relevantGeneration = relevantGeneration - 4
+
+        if relevantGeneration != "" and gen1 == "":
+            branchListList = []
+            for gen in range(relevantGeneration, maxGeneration + 1):
+                branchInnerlist = []
+                try:
+                    branchListListPosition = relevantGeneration
+                except:
+                    branchListListPosition = -1  # last element, if the list is not four elements large
+                for branch in branchListOverall[branchListListPosition]:
+                    innerCounter = 0
+                    for p in personList:
+                        if p["generation"] == gen:
+                            if p["sex"] == 0 and p["earlyDeath"] == 0:
+                                fatherId = fathersDict[p["id"]]
+                                while fatherId != 1:
+                                    if fatherId < branch:
+                                        break
+                                    if fatherId == branch:
+                                        innerCounter = innerCounter + 1
+                                        break  # do not search further
+                                    fatherId = fathersDict[fatherId]  # next father
+                    branchInnerlist.append(innerCounter)
+                branchInnerlist.sort(reverse=True)
+                branchListList.append(branchInnerlist)
+
+                newListbig = branchListList
+                newList = branchInnerlist
+                newList.sort(reverse=True)  # sort descending
+
+                failed = 0
+                for position, element in enumerate(newList):
+                    if len(aimList) == position:
+                        break
+
+                    if aimList[position] > newList[position]:
+                        failedBefore = 0
+                        for newPosition in range(0, len(newListbig)):
+
+                            if aimList[position] >= newListbig[newPosition][position]:
+                                failedBefore = 1
+
+                        if failedBefore == 1:
+                            failed = 1
+                            break
+
+                if gen1 == "":
+                    if newList[0] != 0:
+                        if failed == 0:
+                            gen1 = relevantGeneration
+                            gen2 = gen
+                            break
+
+    # family analysis
+    numberPerGenerationList = []
+    maleAduldNumberPerGenerationList = []
+    extinctGeneration = ""  # generation in which the family dies out
+    for generation in range(0, maxGeneration + 1):
+        numberPerGeneration = 0
+        maleAduldNumberPerGeneration = 0
+        for person in personList:
+            if person["generation"] == generation:
+                numberPerGeneration = numberPerGeneration + 1
+                if person["sex"] == 0 and person["earlyDeath"] == 0:
+                    maleAduldNumberPerGeneration = maleAduldNumberPerGeneration + 1
+        numberPerGenerationList.append(numberPerGeneration)
+        maleAduldNumberPerGenerationList.append(maleAduldNumberPerGeneration)
+        if numberPerGeneration == 0 and extinctGeneration == "":
+            extinctGeneration = generation
+
+    return FamilyResult(gen1, gen2, extinctGeneration, numberPerGenerationList, maleAduldNumberPerGenerationList)
+
+
+def personListOfPedigree(pedigree):
+    """
+    Converts a pedigree into the persons of the original algorithm, the ids are the positions in the pedigree + 1.
+    :param pedigree: simulated family (Pedigree)
+    :return: list of persons and id of the father per id of a child (tuple of list and dictionary)
+    """
+    personList = []
+    fathersDict = {}
+    for position in range(pedigree.numberOfPersons):
+        idFather = int(pedigree.father[position]) + 1  # 0 for the initial person
+        personList.append({"id": position + 1, "idFather": idFather, "generation": int(pedigree.generation[position]),
+                           "sex": int(pedigree.sex[position]), "earlyDeath": int(pedigree.earlyDeath[position])})
+        if position > 0:
+            fathersDict[position + 1] = idFather
+    return personList, fathersDict
@@ -0,0 +1,163 @@
+import logging
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+from branching import simulateFamilyCounts
+from family import SimulationResult, simulateFamily
+from reference import simulateFamilyReference
+
+logger = logging.getLogger(__name__)
+
+# simulation of one family: individual persons, numbers of persons per branch or the original algorithm
+engines = {"individual": simulateFamily, "counts": simulateFamilyCounts, "reference": simulateFamilyReference}
+
+# largest number of families per task, so the memory of a run does not grow with the number of families
+maxChunkSize = 100
+
+
+def simulateFamilies(sampler, firstFamily, lastFamily, maxGeneration, aimList, collectStatistics=True,
+                     engine="individual"):
+    """
+    This function simulates a chunk of families one after another, each family with its own random stream.
+    :param sampler: sampler of the simulation (OffspringSampler)
+    :param firstFamily: number of the first family of the chunk (integer)
+    :param lastFamily: number after the last family of the chunk (integer)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :param aimList: number of individuals per location, largest value first (list)
+    :param collectStatistics: simulate all generations for the lists per generation (boolean)
+    :param engine: name of the simulation of one family, key of engines (string)
+    :return: outcomes of the families in order (list of FamilyResult)
+    """
+    simulate = engines[engine]
+    familyResults = []
+    for famNum in range(firstFamily, lastFamily):
+        logger.debug("-------------------- family %d", famNum)
+        familyResults.append(simulate(sampler.forFamily(famNum), maxGeneration, aimList, collectStatistics))
+    return familyResults
+
+
+def simulateChunk(sampler, firstFamily, lastFamily, maxGeneration, aimList, collectStatistics, engine, measure):
+    """
+    This function simulates a chunk of families like simulateFamilies in a worker process and can measure the phases
+    of the simulation. The lists per generation are sent back as they are and folded into statistics by the result
+    in the main process: for a chunk of families they are much smaller than the statistics.
+    :param measure: measure the phases and counters of the chunk (boolean)
+    :return: outcomes of the families in order (list of FamilyResult) and measurements of the chunk or None
+             (Measurements)
+    """
+    arguments = (sampler, firstFamily, lastFamily, maxGeneration, aimList, collectStatistics, engine)
+    measurements = None
+    if measure:
+        with instrumentation.collect() as measurements:
+            familyResults = simulateFamilies(*arguments)
+    else:
+        familyResults = simulateFamilies(*arguments)
+    return familyResults, measurements
+
+
+def familyChunks(numberOfSimulatedFamilies, chunkSize, firstFamily=0):
+    """
+    :param numberOfSimulatedFamilies: number of families to simulate (integer)
+    :param chunkSize: number of families per chunk (integer)
+    :param firstFamily: number of the first family (integer)
+    :return: first family and number after the last family per chunk (list of tuples)
+    """
+    lastFamily = firstFamily + numberOfSimulatedFamilies
+    return [(chunkStart, min(chunkStart + chunkSize, lastFamily))
+            for chunkStart in range(firstFamily, lastFamily, chunkSize)]
+
+
+def defaultChunkSize(numberOfSimulatedFamilies, numberOfWorkers):
+    """
+    :param numberOfSimulatedFamilies: number of families to simulate (integer)
+    :param numberOfWorkers: number of processes (integer)
+    :return: about four tasks per process, at most maxChunkSize families per task (integer)
+    """
+    return max(1, min(maxChunkSize, math.ceil(numberOfSimulatedFamilies / (numberOfWorkers * 4))))
+
+
+def resultsInOrder(executor, function, tasks, maxPending):
+    """
+    Runs the function for every task in the processes of the executor and returns the results in the order of the
+    tasks. At most maxPending tasks are submitted at a time, so results finished ahead of their turn cannot pile up.
+    :param executor: pool of processes (ProcessPoolExecutor)
+    :param function: function of a task (function)
+    :param tasks: arguments of the function per task (iterable of tuples)
+    :param maxPending: largest number of submitted tasks whose results were not returned yet (integer)
+    :return: results of the tasks in order (generator)
+    """
+    futures = deque()
+    for task in tasks:
+        futures.append(executor.submit(function, *task))
+        if len(futures) >= maxPending:
+            yield futures.popleft().result()
+    while futures:
+        yield futures.popleft().result()
+
+
+def runFamilies(sampler, numberOfSimulatedFamilies, maxGeneration, aimList, numberOfWorkers=1, chunkSize=None,
+                collectStatistics=True, engine="individual", result=None, measurements=None, firstFamily=0,
+                executor=None):
+    """
+    This function simulates all families, distributed in chunks over several processes.
+    Every family draws from its own random stream, so for a given seed the result does not depend on the
+    number of processes or the size of the chunks.
+    :param sampler: sampler of the simulation (OffspringSampler)
+    :param numberOfSimulatedFamilies: number of families to simulate (integer)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :param aimList: number of individuals per location, largest value first (list)
+    :param numberOfWorkers: number of processes, None for one per processor core (integer)
+    :param chunkSize: number of families per task, None for about four tasks per process, but at most maxChunkSize
+                      (integer)
+    :param collectStatistics: simulate all generations for the lists per generation, otherwise each family
+                              stops as soon as its outcome is decided (boolean)
+    :param engine: "individual" simulates every person, "counts" only the number of persons per branch,
+                   "reference" uses the original, much slower algorithm (string)
+    :param result: receives the outcome of each family in the order of the families, a new SimulationResult
+                   if None (SimulationResult or ResultWriter)
+    :param measurements: receives the measured phases and counters of all chunks, nothing is measured
+                         if None (Measurements)
+    :param firstFamily: number of the first family, further families can be added to an earlier run (integer)
+    :param executor: processes to submit the chunks to, e.g. one pool for several runs, a new pool with
+                     numberOfWorkers processes if None (ProcessPoolExecutor)
+    :return: result with the outcomes of all families (SimulationResult or ResultWriter)
+    """
+    if numberOfWorkers is None:
+        numberOfWorkers = os.cpu_count() or 1
+    if chunkSize is None:
+        chunkSize = defaultChunkSize(numberOfSimulatedFamilies, numberOfWorkers)
+    chunks = familyChunks(numberOfSimulatedFamilies, chunkSize, firstFamily)
+
+    if result is None:
+        result = SimulationResult()
+    # each chunk is measured in the process that simulates it
+    measure = measurements is not None
+
+    def addChunk(chunkResult):
+        familyResults, chunkMeasurements = chunkResult
+        if chunkMeasurements is not None:
+            measurements.add(chunkMeasurements)
+        for familyResult in familyResults:
+            result.add(familyResult)
+
+    if numberOfWorkers == 1 and executor is None:
+        for firstFamily, lastFamily in chunks:
+            addChunk(simulateChunk(sampler, firstFamily, lastFamily, maxGeneration, aimList, collectStatistics,
+                                   engine, measure))
+        return result
+
+    tasks = ((sampler, firstFamily, lastFamily, maxGeneration, aimList, collectStatistics, engine, measure)
+             for firstFamily, lastFamily in chunks)
+    if executor is not None:
+        for chunkResult in resultsInOrder(executor, simulateChunk, tasks, 2 * numberOfWorkers):
+            addChunk(chunkResult)
+        return result
+    with ProcessPoolExecutor(max_workers=numberOfWorkers) as executor:
+        # merge in the order of the families, not in the order the chunks are finished
+        # about two chunks per process are in progress, merged chunks are dropped at once
+        for chunkResult in resultsInOrder(executor, simulateChunk, tasks, 2 * numberOfWorkers):
+            addChunk(chunkResult)
+    return result
@@ -0,0 +1,224 @@
+import numpy as np
+
+
+class OffspringDistribution:
+    """
+    Discrete distribution of the number of children of a father.
+    The number of children is the skewed normal distribution rounded to whole numbers, negative values mean no children.
+    The probabilities are computed once and sampled with an alias table, so each draw needs constant time.
+    """
+
+    def __init__(self, a, loc, scale, tolerance=1e-12):
+        """
+        :param a: skewness of the distribution of children (integer)
+        :param loc: expected value of the number of children (integer)
+        :param scale: standard deviation of the number of children (integer)
+        :param tolerance: probability mass of the upper tail that is cut off (float)
+        """
+        # scipy is only needed once per distribution, not when the module is imported
+        from scipy.stats import skewnorm
+
+        self.a = a
+        self.loc = loc
+        self.scale = scale
+
+        # number k is drawn for all values between k - 0.5 and k + 0.5, zero also for all negative values
+        maxChildren = max(int(np.ceil(skewnorm.isf(tolerance, a=a, loc=loc, scale=scale))), 0)
+        cdf = skewnorm.cdf(np.arange(maxChildren + 1) + 0.5, a=a, loc=loc, scale=scale)
+        pmf = np.diff(cdf, prepend=0.0)
+        self.pmf = pmf / pmf.sum()
+        self.aliasProbability, self.alias = aliasTable(self.pmf)
+
+    @property
+    def maxChildren(self):
+        return len(self.pmf) - 1
+
+    def mean(self):
+        """
+        :return: expected number of children (float)
+        """
+        return float(np.dot(np.arange(len(self.pmf)), self.pmf))
+
+    def sample(self, rng, size):
+        """
+        :param rng: random number generator (numpy Generator)
+        :param size: number of fathers (integer)
+        :return: number of children per father (numpy array)
+        """
+        column = rng.integers(0, len(self.pmf), size=size)
+        keep = rng.random(size) < self.aliasProbability[column]
+        return np.where(keep, column, self.alias[column])
+
+    def sampleSums(self, rng, numberOfFathers):
+        """
+        Draws the total number of children of groups of fathers without drawing each father separately:
+        the number of fathers per number of children is multinomially distributed.
+        :param rng: random number generator (numpy Generator)
+        :param numberOfFathers: number of fathers per group (numpy array)
+        :return: number of children per group (numpy array)
+        """
+        numberOfFathers = np.asarray(numberOfFathers, dtype=np.int64)
+        if len(numberOfFathers) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return rng.multinomial(numberOfFathers, self.pmf) @ np.arange(len(self.pmf))
+
+
+def aliasTable(pmf):
+    """
+    This function builds the alias table of a discrete distribution (method of Vose).
+    :param pmf: probabilities of the values 0 to n - 1 (numpy array)
+    :return: probability to keep the drawn column and alternative value per column (numpy arrays)
+    """
+    n = len(pmf)
+    scaled = np.asarray(pmf, dtype=np.float64) * n
+    probability = np.ones(n)
+    alias = np.arange(n)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+        probability[less] = scaled[less]
+        alias[less] = more
+        scaled[more] = scaled[more] + scaled[less] - 1.0
+        if scaled[more] < 1.0:
+            small.append(more)
+        else:
+            large.append(more)
+    # remaining columns are full apart from rounding errors
+    return probability, alias
+
+
+def checkRatio(firstRatio, secondRatio):
+    """
+    :param firstRatio: probability of the first possibility in percent (integer)
+    :param secondRatio: probability of the second possibility in percent (integer)
+    :return: probability of the second possibility (float)
+    """
+    if firstRatio + secondRatio != 100:
+        raise ValueError("Error: Ratio is not 100 percent")
+    return secondRatio / 100
+
+
+class OffspringSampler:
+    """
+    Draws the random properties of a whole generation at once.
+    All draws use one numpy Generator, so a run can be repeated exactly by passing the same seed.
+    The flags use the coding of the simulation: 0 for the first state (male, grown up, had children), 1 for the second.
+    """
+
+    def __init__(self, a, loc, scale, sexRatioMale, sexRatioFemale, earlyLifeRatio, earlyDeathRatio,
+                 noChildlessRatio, childlessRatio, seed=None, distribution=None):
+        """
+        :param a: skewness of the distribution of children (integer)
+        :param loc: expected value of the number of children (integer)
+        :param scale: standard deviation of the number of children (integer)
+        :param sexRatioMale: share of male children in percent (integer)
+        :param sexRatioFemale: share of female children in percent (integer)
+        :param earlyLifeRatio: share of children who grow up in percent (integer)
+        :param earlyDeathRatio: share of children who die early in percent (integer)
+        :param noChildlessRatio: share of adults with children in percent (integer)
+        :param childlessRatio: share of adults without children in percent (integer)
+        :param seed: seed of the random numbers, None for a different result on every run (integer or SeedSequence)
+        :param distribution: already computed distribution of children, is created if None (OffspringDistribution)
+        """
+        self.a = a
+        self.loc = loc
+        self.scale = scale
+        self.sexRatioMale = sexRatioMale
+        self.sexRatioFemale = sexRatioFemale
+        self.earlyLifeRatio = earlyLifeRatio
+        self.earlyDeathRatio = earlyDeathRatio
+        self.noChildlessRatio = noChildlessRatio
+        self.childlessRatio = childlessRatio
+
+        self.femaleProbability = checkRatio(sexRatioMale, sexRatioFemale)
+        self.earlyDeathProbability = checkRatio(earlyLifeRatio, earlyDeathRatio)
+        self.childlessProbability = checkRatio(noChildlessRatio, childlessRatio)
+
+        if distribution is None:
+            distribution = OffspringDistribution(a, loc, scale)
+        self.distribution = distribution
+
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seedSequence = seed
+        self.rng = np.random.Generator(np.random.PCG64(seed))
+
+    def spawn(self, number):
+        """
+        Creates samplers with independent random streams, e.g. one per family.
+        The table of the distribution of children is shared.
+        :param number: number of samplers (integer)
+        :return: samplers (list of OffspringSampler)
+        """
+        return [self.withSeed(seed) for seed in self.seedSequence.spawn(number)]
+
+    def forFamily(self, famNum):
+        """
+        Creates the sampler of one family. The random stream only depends on the seed and the number of the family,
+        so the families can be simulated in any order and in several processes with identical results.
+        :param famNum: number of the family (integer)
+        :return: sampler with the random stream of the family (OffspringSampler)
+        """
+        seed = np.random.SeedSequence(self.seedSequence.entropy, spawn_key=self.seedSequence.spawn_key + (famNum,))
+        return self.withSeed(seed)
+
+    def withSeed(self, seed):
+        """
+        :param seed: seed of the random numbers (integer or SeedSequence)
+        :return: sampler with the same parameters and its own random stream (OffspringSampler)
+        """
+        return OffspringSampler(self.a, self.loc, self.scale, self.sexRatioMale, self.sexRatioFemale,
+                                self.earlyLifeRatio, self.earlyDeathRatio, self.noChildlessRatio,
+                                self.childlessRatio, seed=seed, distribution=self.distribution)
+
+    def numberOfChildren(self, numberOfFathers):
+        """
+        :param numberOfFathers: number of fathers (integer)
+        :return: number of children per father (numpy array)
+        """
+        return self.distribution.sample(self.rng, numberOfFathers)
+
+    def childrenOfGroups(self, numberOfFathers):
+        """
+        :param numberOfFathers: number of fathers per group (numpy array)
+        :return: total number of children per group (numpy array)
+        """
+        return self.distribution.sampleSums(self.rng, numberOfFathers)
+
+    def adultMaleChildren(self, numberOfChildren):
+        """
+        Only male children who did not die early can become fathers, sex and early death are independent.
+        :param numberOfChildren: number of children per group (numpy array)
+        :return: number of adult male children per group (numpy array)
+        """
+        return self.rng.binomial(numberOfChildren, (1 - self.femaleProbability) * (1 - self.earlyDeathProbability))
+
+    def fathersAmong(self, numberOfAdultMales):
+        """
+        :param numberOfAdultMales: number of adult males per group (numpy array)
+        :return: number of adult males per group who did not remain childless (numpy array)
+        """
+        return self.rng.binomial(numberOfAdultMales, 1 - self.childlessProbability)
+
+    def sex(self, size):
+        """
+        :param size: number of children (integer)
+        :return: 0 for male, 1 for female (numpy array)
+        """
+        return (self.rng.random(size) < self.femaleProbability).astype(np.int8)
+
+    def earlyDeath(self, size):
+        """
+        :param size: number of children (integer)
+        :return: 0 if grown up, 1 if died as a child (numpy array)
+        """
+        return (self.rng.random(size) < self.earlyDeathProbability).astype(np.int8)
+
+    def childless(self, size):
+        """
+        :param size: number of adults (integer)
+        :return: 0 if had children, 1 if remained childless (numpy array)
+        """
+        return (self.rng.random(size) < self.childlessProbability).astype(np.int8)
@@ -0,0 +1,124 @@
+import os
+import time
+
+from adaptive import runAdaptive, writePrecision
+from analytic import GeneratingFunctionModel
+from cache import PedigreeCache, analyseEnsemble
+from instrumentation import Measurements, writeSummary
+from output import ResultWriter, determineGen3List
+from runner import runFamilies
+from splitting import runSplitting, writeWeightedHistograms
+from sweep import runSweep, scenarioGrid
+
+
+class SimulationOutcome:
+    """
+    Lists of a finished simulation run, the same values as in the CSV files.
+    """
+
+    def __init__(self, writer, monitor=None):
+        """
+        :param writer: writer of the finished run (ResultWriter)
+        :param monitor: monitor of an adaptive run, None for a fixed number of families (ConvergenceMonitor)
+        """
+        self.numberOfFamilies = writer.numberOfFamilies
+        # List of the number of relevant generations (after how many generations there are enough branches)
+        self.gen1List = writer.column("gen1").tolist()
+        self.gen2List = writer.column("gen2").tolist()  # generation with enough people per branch
+        # determination of the previous generations
+        self.gen3List = determineGen3List(self.gen1List, self.gen2List)
+        # number of generations after which the extinct families died out
+        self.extinctGenerationList = writer.column("extinctGeneration").tolist()
+        # average over all families, only if the statistics were collected
+        self.averageNumberPerGeneration = None
+        self.averageMaleAduldNumberPerGeneration = None
+        if writer.numberOfFamiliesWithStatistics > 0:
+            self.averageNumberPerGeneration = writer.averageNumberPerGeneration()
+            self.averageMaleAduldNumberPerGeneration = writer.averageMaleAduldNumberPerGeneration()
+        # mean, standard deviation and quantiles per generation (GenerationAccumulator)
+        self.statistics = writer.statistics
+        self.monitor = monitor
+
+
+def runSimulation(parameters):
+    """
+    This function simulates the families of one scenario and writes the CSV files to resultDirectory.
+    With a sweepGrid all scenarios of the grid are simulated instead, with a splittingFactor only the weighted
+    histograms are computed.
+    :param parameters: parameters of the run (SimulationParameters)
+    :return: lists of the scenario, None for a sweep (SimulationOutcome), weighted histograms with a splittingFactor
+             (WeightedResult)
+    """
+    if parameters.sweepGrid is not None:
+        runSweep(scenarioGrid(parameters.scenarioParameters(), parameters.sweepGrid, parameters.scenario),
+                 parameters.checkpointDirectory, parameters.resultDirectory, parameters.numberOfWorkers)
+        return None
+
+    if parameters.splittingFactor is not None:
+        result = runSplitting(parameters.sampler(), parameters.numberOfSimulatedFamilies, parameters.maxGeneration,
+                              parameters.aimList, parameters.splittingFactor, parameters.maxTrajectoriesPerFamily,
+                              parameters.numberOfWorkers)
+        os.makedirs(parameters.resultDirectory, exist_ok=True)
+        writeWeightedHistograms(os.path.join(parameters.resultDirectory,
+                                             "weightedHistograms-" + parameters.scenario + ".csv"), result)
+        return result
+
+    if parameters.pedigreeCacheDirectory is not None and parameters.seed is None:
+        # without a seed every run has other families, a saved ensemble could never be used again
+        raise ValueError("Error: pedigreeCacheDirectory needs a fixed seed")
+
+    # random numbers for the whole simulation, every family draws from its own stream
+    sampler = parameters.sampler()
+    # the outcome of each family is written to resultDirectory as soon as it is simulated
+    # only the running statistics per generation are kept in memory
+    writer = ResultWriter(parameters.resultDirectory, parameters.scenario, parameters.maxGeneration)
+
+    monitor = None
+    measurements = Measurements() if parameters.instrumentationEnabled else None
+    start = time.perf_counter()
+    if parameters.pedigreeCacheDirectory is not None:
+        # the families are simulated only if they are not in the cache yet
+        ensemble = PedigreeCache(parameters.pedigreeCacheDirectory, parameters.pedigreeCacheSize).ensemble(
+            sampler, parameters.numberOfSimulatedFamilies, parameters.maxGeneration, parameters.numberOfWorkers,
+            measurements)
+        analyseEnsemble(ensemble, [parameters.aimList], [writer], parameters.numberOfSimulatedFamilies,
+                        parameters.maxGeneration, parameters.numberOfWorkers, measurements=measurements)
+    elif parameters.targetPrecision is not None:
+        # batches of families until the histograms are precise enough
+        result, monitor = runAdaptive(sampler, parameters.maxGeneration, parameters.aimList,
+                                      parameters.targetPrecision, parameters.numberOfSimulatedFamilies,
+                                      parameters.batchSize, parameters.maxSimulationSeconds,
+                                      numberOfWorkers=parameters.numberOfWorkers,
+                                      collectStatistics=parameters.collectStatistics, engine=parameters.engine,
+                                      result=writer, measurements=measurements)
+        writePrecision(os.path.join(parameters.resultDirectory, "precision-" + parameters.scenario + ".json"),
+                       monitor, parameters.targetPrecision)
+    else:
+        # iterate each family
+        runFamilies(sampler, parameters.numberOfSimulatedFamilies, parameters.maxGeneration, parameters.aimList,
+                    parameters.numberOfWorkers, collectStatistics=parameters.collectStatistics,
+                    engine=parameters.engine, result=writer, measurements=measurements)
+    if measurements is not None:
+        # the phases are summed over all processes, so they can add up to more than the duration of the run
+        writeSummary(os.path.join(parameters.resultDirectory, "instrumentation-" + parameters.scenario + ".json"),
+                     measurements, time.perf_counter() - start, dict(parameters.scenarioParameters(),
+                                                                     scenario=parameters.scenario,
+                                                                     numberOfWorkers=parameters.numberOfWorkers))
+
+    # outputs the contents of the gen1list, gen2list, gen3list, and extinctGenerationList lists
+    writer.close()
+    return SimulationOutcome(writer, monitor)
+
+
+def runAnalytic(parameters):
+    """
+    This function computes the expected values per generation from the generating functions, without simulation.
+    :param parameters: parameters of the run (SimulationParameters)
+    :return: values per generation, generation 0 to maxGeneration (dictionary of numpy arrays)
+    """
+    model = GeneratingFunctionModel(parameters.sampler())
+    maxGeneration = parameters.maxGeneration
+    return {"extinctProbability": model.extinctProbabilities(maxGeneration),
+            "meanPersons": model.meanPersons(maxGeneration),
+            "meanAdultMales": model.meanAdultMales(maxGeneration),
+            "expectedBranches": model.expectedBranches(maxGeneration)}
@@ -0,0 +1,230 @@
+import csv
+import math
+import os
+
+import numpy as np
+
+from analytic import GeneratingFunctionModel
+from branching import FamilyCounts
+from cache import runChunks
+from output import determineGen3List
+from runner import defaultChunkSize, familyChunks
+
+
+def splittingLevels(sampler, maxGeneration):
+    """
+    Levels of the number of adult males at which a family is split: level k of a generation is splittingFactor^k
+    times the expected number of adult males of the generation (from the generating functions). A family far above
+    the expected number is much more likely to reach the target early, the expected number is only the scale.
+    :param sampler: parameters of the simulation (OffspringSampler)
+    :param maxGeneration: number of simulated generations (integer)
+    :return: expected number of adult males per generation, the scale of the levels (numpy array)
+    """
+    return GeneratingFunctionModel(sampler).meanAdultMales(maxGeneration)
+
+
+def simulateFamilySplitting(sampler, maxGeneration, aimList, levels, splittingFactor, maxTrajectories):
+    """
+    This function simulates one family with multilevel splitting. As soon as the number of adult males of a
+    generation reaches the next level, the family is copied into splittingFactor families per level that continue with
+    their own random streams, each with the weight divided by splittingFactor. A family that falls two levels below its
+    level is only continued with probability 1 / splittingFactor (Russian roulette), with the weight multiplied by
+    splittingFactor. So the promising families are simulated many times, the hopeless ones rarely, and the weighted
+    outcomes still have the distribution of simulateFamilyCounts.
+    Every copy is continued until its outcome is decided or it died out, afterwards only the number of adult males
+    is continued until it dies out, as with collectStatistics = False.
+    :param sampler: sampler of the family (OffspringSampler)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :param aimList: number of individuals per location, largest value first (list)
+    :param levels: expected number of adult males per generation, from splittingLevels (numpy array)
+    :param splittingFactor: number of copies per level (integer)
+    :param maxTrajectories: largest number of copies of the family, no more splitting afterwards (integer)
+    :return: weight and outcome of every copy (list of tuples of float and FamilyResult)
+    """
+    # copies still to be simulated: weight, number of levels reached and state
+    trajectories = [(1.0, 0, FamilyCounts(sampler, aimList))]
+    numberOfTrajectories = 1
+    outcomes = []
+    while trajectories:
+        weight, level, family = trajectories.pop()
+        removed = False
+        while family.generation < maxGeneration and not family.finished:
+            family.step()
+            if family.finished or family.generation == maxGeneration:
+                continue
+            if family.numberOfAdultMales == 0:
+                # dies out in the next generation anyway
+                continue
+            # level of the family: splittingFactor^level times the expected number of adult males
+            reached = math.floor(math.log(family.numberOfAdultMales / levels[family.generation])
+                                 / math.log(splittingFactor))
+            if reached < level - 1:
+                # Russian roulette: a family that fell two levels behind is continued with probability
+                # 1 / splittingFactor and the weight multiplied by splittingFactor
+                if family.sampler.rng.random() * splittingFactor >= 1:
+                    removed = True
+                    break
+                weight = weight * splittingFactor
+                level = level - 1
+                continue
+            if reached <= level:
+                continue
+            copies = min(splittingFactor ** (reached - level), maxTrajectories - numberOfTrajectories + 1)
+            level = reached
+            if copies < 2:
+                continue
+            weight = weight / copies
+            for copySampler in family.sampler.spawn(copies - 1):
+                trajectories.append((weight, level, family.clone(copySampler)))
+            numberOfTrajectories = numberOfTrajectories + copies - 1
+        if not removed:
+            family.continueUntilExtinct(maxGeneration)
+            outcomes.append((weight, family.result(collectStatistics=False)))
+    return outcomes
+
+
+def simulateFamiliesSplitting(sampler, firstFamily, lastFamily, maxGeneration, aimList, splittingFactor,
+                              maxTrajectories):
+    """
+    This function simulates a chunk of families with multilevel splitting, each family with its own random stream.
+    :param sampler: sampler of the simulation (OffspringSampler)
+    :param firstFamily: number of the first family of the chunk (integer)
+    :param lastFamily: number after the last family of the chunk (integer)
+    :return: weights and outcomes of the copies per family (list of lists)
+    """
+    levels = splittingLevels(sampler, maxGeneration)
+    return [simulateFamilySplitting(sampler.forFamily(famNum), maxGeneration, aimList, levels, splittingFactor,
+                                    maxTrajectories)
+            for famNum in range(firstFamily, lastFamily)]
+
+
+class WeightedResult:
+    """
+    Weighted histograms of gen1, gen2, gen3 and the generation of dying out of a simulation with splitting.
+    The histograms estimate the share of all families per generation (not only of the families reaching the target).
+    The copies of one family are not independent, so the weights are summed per family and the standard errors
+    are computed from these sums.
+    """
+
+    names = ["gen1", "gen2", "gen3", "extinctGeneration"]
+
+    def __init__(self, maxGeneration):
+        """
+        :param maxGeneration: number of simulated generations (integer)
+        """
+        self.maxGeneration = maxGeneration
+        self.numberOfFamilies = 0
+        self.numberOfTrajectories = 0
+        # sum of the weights per family and of their squares, per generation
+        self.sums = {name: np.zeros(maxGeneration + 1) for name in self.names}
+        self.squares = {name: np.zeros(maxGeneration + 1) for name in self.names}
+        # weight of the copies reaching the target per family, summed over all generations
+        self.reachedSum = 0.0
+        self.reachedSquares = 0.0
+
+    def add(self, outcomes):
+        """
+        :param outcomes: weight and outcome of every copy of the next family (list of tuples)
+        """
+        weights = {name: np.zeros(self.maxGeneration + 1) for name in self.names}
+        for weight, familyResult in outcomes:
+            if familyResult.gen2 != "":
+                weights["gen1"][familyResult.gen1] += weight
+                weights["gen2"][familyResult.gen2] += weight
+                weights["gen3"][determineGen3List([familyResult.gen1], [familyResult.gen2])[0]] += weight
+            if familyResult.extinctGeneration != "":
+                weights["extinctGeneration"][familyResult.extinctGeneration] += weight
+        for name in self.names:
+            self.sums[name] += weights[name]
+            self.squares[name] += weights[name] ** 2
+        # the generations of one copy exclude each other, so the sum over the generations is its weight
+        reached = weights["gen2"].sum()
+        self.reachedSum = self.reachedSum + reached
+        self.reachedSquares = self.reachedSquares + reached ** 2
+        self.numberOfFamilies = self.numberOfFamilies + 1
+        self.numberOfTrajectories = self.numberOfTrajectories + len(outcomes)
+
+    def merge(self, other):
+        """
+        :param other: weighted histograms of further families (WeightedResult)
+        """
+        for name in self.names:
+            self.sums[name] += other.sums[name]
+            self.squares[name] += other.squares[name]
+        self.reachedSum = self.reachedSum + other.reachedSum
+        self.reachedSquares = self.reachedSquares + other.reachedSquares
+        self.numberOfFamilies = self.numberOfFamilies + other.numberOfFamilies
+        self.numberOfTrajectories = self.numberOfTrajectories + other.numberOfTrajectories
+
+    def histogram(self, name):
+        """
+        :param name: "gen1", "gen2", "gen3" or "extinctGeneration" (string)
+        :return: estimated share of the families per generation (numpy array)
+        """
+        return self.sums[name] / max(self.numberOfFamilies, 1)
+
+    def standardError(self, name):
+        """
+        :param name: "gen1", "gen2", "gen3" or "extinctGeneration" (string)
+        :return: standard error of the share per generation (numpy array)
+        """
+        if self.numberOfFamilies < 2:
+            return np.zeros(self.maxGeneration + 1)
+        mean = self.histogram(name)
+        variance = (self.squares[name] - self.numberOfFamilies * mean ** 2) / (self.numberOfFamilies - 1)
+        return np.sqrt(np.clip(variance, 0.0, None) / self.numberOfFamilies)
+
+    def reachedShare(self):
+        """
+        :return: estimated share of the families that reach the target and its standard error (tuple of floats)
+        """
+        mean = self.reachedSum / max(self.numberOfFamilies, 1)
+        if self.numberOfFamilies < 2:
+            return mean, 0.0
+        variance = (self.reachedSquares - self.numberOfFamilies * mean ** 2) / (self.numberOfFamilies - 1)
+        return mean, math.sqrt(max(variance, 0.0) / self.numberOfFamilies)
+
+
+def runSplitting(sampler, numberOfSimulatedFamilies, maxGeneration, aimList, splittingFactor=2, maxTrajectories=1000,
+                 numberOfWorkers=1, chunkSize=None):
+    """
+    This function simulates the families with multilevel splitting, distributed in chunks over several processes.
+    For a given seed the result does not depend on the number of processes.
+    :param sampler: sampler of the simulation (OffspringSampler)
+    :param numberOfSimulatedFamilies: number of families to simulate, without the copies (integer)
+    :param maxGeneration: number of generations to be simulated (integer)
+    :param aimList: number of individuals per location, largest value first (list)
+    :param splittingFactor: number of copies per level (integer)
+    :param maxTrajectories: largest number of copies of one family (integer)
+    :param numberOfWorkers: number of processes, None for one per processor core (integer)
+    :param chunkSize: number of families per task, None for about four tasks per process, but at most maxChunkSize
+                      (integer)
+    :return: weighted histograms (WeightedResult)
+    """
+    if splittingFactor < 2:
+        raise ValueError("Error: splittingFactor must be at least 2")
+    if numberOfWorkers is None:
+        numberOfWorkers = os.cpu_count() or 1
+    if chunkSize is None:
+        chunkSize = defaultChunkSize(numberOfSimulatedFamilies, numberOfWorkers)
+    tasks = [(sampler, firstFamily, lastFamily, maxGeneration, aimList, splittingFactor, maxTrajectories)
+             for firstFamily, lastFamily in familyChunks(numberOfSimulatedFamilies, chunkSize)]
+    result = WeightedResult(maxGeneration)
+    for outcomes in runChunks(simulateFamiliesSplitting, tasks, numberOfWorkers):
+        result.add(outcomes)
+    return result
+
+
+def writeWeightedHistograms(path, result):
+    """
+    Writes the weighted histograms as CSV file with heading, one row per generation.
+    :param path: path of the file (string)
+    :param result: weighted histograms (WeightedResult)
+    """
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["generation"] + [column for name in result.names for column in [name, name + "Error"]])
+        for generation in range(result.maxGeneration + 1):
+            writer.writerow([generation] + [value for name in result.names
+                                            for value in [result.histogram(name)[generation],
+                                                          result.standardError(name)[generation]]])
@@ -0,0 +1,202 @@
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from family import FamilyResult, SimulationResult
+from output import writeResultFiles, writtenInOneStep
+from runner import familyChunks, resultsInOrder, simulateFamilies
+from sampler import OffspringSampler
+
+# ratios are given in percent, the other value of a pair is adjusted if only one of them is varied
+complementaryRatios = {"sexRatioMale": "sexRatioFemale", "sexRatioFemale": "sexRatioMale",
+                       "earlyLifeRatio": "earlyDeathRatio", "earlyDeathRatio": "earlyLifeRatio",
+                       "noChildlessRatio": "childlessRatio", "childlessRatio": "noChildlessRatio"}
+
+logger = logging.getLogger(__name__)
+
+
+def scenarioGrid(baseParameters, grid, scenario):
+    """
+    This function creates one scenario for every combination of the values in the grid.
+    :param baseParameters: parameters of the simulation, named like the variables in main.py (dictionary)
+    :param grid: values per varied parameter, e.g. {"loc": [2, 3, 4]} (dictionary)
+    :param scenario: first part of the names of the scenarios (string)
+    :return: name and parameters per scenario (list of tuples)
+    """
+    keys = list(grid)
+    scenarios = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        parameters = dict(baseParameters)
+        for key, value in zip(keys, values):
+            parameters[key] = value
+            if key in complementaryRatios and complementaryRatios[key] not in grid:
+                parameters[complementaryRatios[key]] = 100 - value
+        # e.g. B-earlyDeathRatio40-loc3-maxGeneration11
+        name = "-".join([scenario] + [key + str(value) for key, value in zip(keys, values)])
+        scenarios.append((name, parameters))
+    return scenarios
+
+
+class ScenarioCheckpoint:
+    """
+    Finished chunks of families of one scenario, saved in a directory of their own.
+    The parameters, the size of the chunks and the seed are saved with them, so an interrupted sweep continues
+    with exactly the same families. Without a seed, the random seed of the first run is kept.
+    """
+
+    def __init__(self, scenario, parameters, checkpointDirectory, chunkSize):
+        """
+        :param scenario: name of the scenario (string)
+        :param parameters: parameters of the simulation, named like the variables in main.py (dictionary)
+        :param checkpointDirectory: directory of all checkpoints of the sweep (string)
+        :param chunkSize: number of families per chunk, only used for a new scenario (integer)
+        """
+        self.scenario = scenario
+        self.directory = os.path.join(checkpointDirectory, scenario)
+        os.makedirs(self.directory, exist_ok=True)
+
+        settings = {"parameters": json.loads(json.dumps(parameters)), "chunkSize": chunkSize}
+        if settings["parameters"].get("seed") is None:
+            settings["parameters"]["seed"] = int(np.random.SeedSequence().entropy)
+
+        settingsPath = os.path.join(self.directory, "scenario.json")
+        if os.path.exists(settingsPath):
+            with open(settingsPath) as file:
+                saved = json.load(file)
+            # the seed may be missing in the new parameters, everything else must be the same
+            if parameters.get("seed") is None:
+                settings["parameters"]["seed"] = saved["parameters"]["seed"]
+            if saved["parameters"] != settings["parameters"]:
+                raise ValueError("Error: Checkpoints of scenario " + scenario + " were created with other parameters")
+            settings = saved
+        else:
+            writeJson(settingsPath, settings)
+
+        self.parameters = settings["parameters"]
+        self.chunkSize = settings["chunkSize"]
+        self._sampler = None
+
+    def chunks(self):
+        """
+        :return: first family and number after the last family per chunk (list of tuples)
+        """
+        return familyChunks(self.parameters["numberOfSimulatedFamilies"], self.chunkSize)
+
+    def chunkPath(self, firstFamily, lastFamily):
+        return os.path.join(self.directory, "chunk-" + str(firstFamily) + "-" + str(lastFamily) + ".json")
+
+    def isDone(self, firstFamily, lastFamily):
+        return os.path.exists(self.chunkPath(firstFamily, lastFamily))
+
+    def save(self, firstFamily, lastFamily, familyResults):
+        """
+        :param firstFamily: number of the first family of the chunk (integer)
+        :param lastFamily: number after the last family of the chunk (integer)
+        :param familyResults: outcomes of the families of the chunk in order (list of FamilyResult)
+        """
+        writeJson(self.chunkPath(firstFamily, lastFamily), [vars(familyResult) for familyResult in familyResults])
+
+    def load(self, firstFamily, lastFamily):
+        """
+        :param firstFamily: number of the first family of the chunk (integer)
+        :param lastFamily: number after the last family of the chunk (integer)
+        :return: outcomes of the families of the chunk in order (list of FamilyResult)
+        """
+        with open(self.chunkPath(firstFamily, lastFamily)) as file:
+            return [FamilyResult(**values) for values in json.load(file)]
+
+    def result(self):
+        """
+        :return: lists of all chunks in the order of the families (SimulationResult)
+        """
+        result = SimulationResult()
+        for firstFamily, lastFamily in self.chunks():
+            for familyResult in self.load(firstFamily, lastFamily):
+                result.add(familyResult)
+        return result
+
+    def sampler(self):
+        """
+        :return: sampler of the scenario (OffspringSampler)
+        """
+        if self._sampler is None:
+            parameters = self.parameters
+            self._sampler = OffspringSampler(parameters["a"], parameters["loc"], parameters["scale"],
+                                             parameters["sexRatioMale"], parameters["sexRatioFemale"],
+                                             parameters["earlyLifeRatio"], parameters["earlyDeathRatio"],
+                                             parameters["noChildlessRatio"], parameters["childlessRatio"],
+                                             seed=parameters["seed"])
+        return self._sampler
+
+    def task(self, firstFamily, lastFamily):
+        """
+        :return: arguments of simulateFamilies for one chunk (tuple)
+        """
+        parameters = self.parameters
+        return (self.sampler(), firstFamily, lastFamily, parameters["maxGeneration"], parameters["aimList"],
+                parameters.get("collectStatistics", True), parameters.get("engine", "individual"))
+
+
+def writeJson(path, values):
+    """
+    Writes a JSON file in one step, an interruption never leaves a half written file.
+    :param path: path of the file (string)
+    :param values: content of the file
+    """
+    with writtenInOneStep(path) as temporaryPath:
+        with open(temporaryPath, 'w') as file:
+            json.dump(values, file)
+
+
+def runSweep(scenarios, checkpointDirectory, outputDirectory=".", numberOfWorkers=None, chunkSize=100):
+    """
+    This function simulates several scenarios with one pool of processes. Every finished chunk of families is saved
+    immediately, a restarted sweep only simulates the missing chunks. As soon as all chunks of a scenario are
+    finished, its CSV files (gen1list-<scenario>.csv etc.) are written.
+    :param scenarios: name and parameters per scenario, e.g. from scenarioGrid (list of tuples)
+    :param checkpointDirectory: directory for the finished chunks (string)
+    :param outputDirectory: directory of the CSV files (string)
+    :param numberOfWorkers: number of processes, None for one per processor core (integer)
+    :param chunkSize: number of families per chunk (integer)
+    """
+    if numberOfWorkers is None:
+        numberOfWorkers = os.cpu_count() or 1
+    os.makedirs(outputDirectory, exist_ok=True)
+
+    checkpoints = [ScenarioCheckpoint(scenario, parameters, checkpointDirectory, chunkSize)
+                   for scenario, parameters in scenarios]
+    tasks = [(checkpoint, firstFamily, lastFamily) for checkpoint in checkpoints
+             for firstFamily, lastFamily in checkpoint.chunks() if not checkpoint.isDone(firstFamily, lastFamily)]
+    missingChunks = {checkpoint.scenario: 0 for checkpoint in checkpoints}
+    for checkpoint, firstFamily, lastFamily in tasks:
+        missingChunks[checkpoint.scenario] = missingChunks[checkpoint.scenario] + 1
+    logger.info("Chunks to simulate: %d", len(tasks))
+
+    def finishChunk(checkpoint, firstFamily, lastFamily, familyResults):
+        checkpoint.save(firstFamily, lastFamily, familyResults)
+        missingChunks[checkpoint.scenario] = missingChunks[checkpoint.scenario] - 1
+        if missingChunks[checkpoint.scenario] == 0:
+            writeResultFiles(checkpoint.result(), checkpoint.scenario, outputDirectory)
+            logger.info("Scenario finished: %s", checkpoint.scenario)
+
+    # scenarios that were already finished in an earlier run
+    for checkpoint in checkpoints:
+        if missingChunks[checkpoint.scenario] == 0:
+            writeResultFiles(checkpoint.result(), checkpoint.scenario, outputDirectory)
+
+    if numberOfWorkers == 1:
+        for checkpoint, firstFamily, lastFamily in tasks:
+            finishChunk(checkpoint, firstFamily, lastFamily,
+                        simulateFamilies(*checkpoint.task(firstFamily, lastFamily)))
+        return
+
+    arguments = (checkpoint.task(firstFamily, lastFamily) for checkpoint, firstFamily, lastFamily in tasks)
+    with ProcessPoolExecutor(max_workers=numberOfWorkers) as executor:
+        # about two chunks per process are in progress, each chunk is saved as soon as the chunks before it are saved
+        for (checkpoint, firstFamily, lastFamily), familyResults in zip(
+                tasks, resultsInOrder(executor, simulateFamilies, arguments, 2 * numberOfWorkers)):
+            finishChunk(checkpoint, firstFamily, lastFamily, familyResults)
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# the modules of the simulation are in the directory above the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sampler import OffspringSampler  # noqa: E402
+
+# demographic parameters of all tests, single values can be changed per test
+demographicParameters = {"a": 6, "loc": 3, "scale": 6, "sexRatioMale": 50, "sexRatioFemale": 50,
+                         "earlyLifeRatio": 60, "earlyDeathRatio": 40, "noChildlessRatio": 80, "childlessRatio": 20}
+
+
+@pytest.fixture
+def sampler():
+    """
+    :return: function of the seed and of changed demographic parameters that returns a new sampler (function)
+    """
+    def seededSampler(seed, **parameters):
+        return OffspringSampler(**dict(demographicParameters, **parameters), seed=seed)
+
+    return seededSampler
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from accumulator import QuantileSketch, RunningMoments
+
+# values per family and generation as in the lists per generation: many zeros, otherwise up to thousands
+rng = np.random.default_rng(7)
+values = np.floor(rng.lognormal(mean=[0.5, 2.0, 4.0, 6.0], sigma=1.5, size=(3000, 4)))
+values[rng.random(values.shape) < 0.3] = 0
+
+
+def testMergedMomentsMatchNumpy():
+    """
+    Moments of batches of different sizes merged in any order give the mean and variance of all values.
+    """
+    parts = []
+    for batch in np.split(values, [1, 40, 1000, 2200]):
+        moments = RunningMoments(values.shape[1])
+        moments.addBatch(batch)
+        parts.append(moments)
+    merged = RunningMoments(values.shape[1])
+    for moments in reversed(parts):
+        merged.merge(moments)
+    assert merged.count == len(values)
+    assert np.allclose(merged.mean, values.mean(axis=0), rtol=1e-12)
+    assert np.allclose(merged.variance(), np.var(values, axis=0, ddof=1), rtol=1e-10)
+
+
+@pytest.mark.parametrize("q", [0.05, 0.25, 0.5, 0.75, 0.95, 0.99])
+def testQuantilesMatchNumpy(q):
+    """
+    The quantiles of merged sketches are within the relative accuracy of the values next to the exact quantile.
+    """
+    relativeAccuracy = 0.01
+    sketch = QuantileSketch(values.shape[1], relativeAccuracy)
+    for batch in np.array_split(values, 7):
+        part = QuantileSketch(values.shape[1], relativeAccuracy)
+        part.addBatch(batch)
+        sketch.merge(part)
+    quantiles = sketch.quantile(q)
+    lower = np.quantile(values, q, axis=0, method="lower")
+    higher = np.quantile(values, q, axis=0, method="higher")
+    assert (quantiles >= lower * (1 - relativeAccuracy)).all()
+    assert (quantiles <= higher * (1 + relativeAccuracy)).all()
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from adaptive import runAdaptive, writePrecision
+from runner import runFamilies
+
+aimList = [5, 3, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1]
+maxGeneration = 8
+
+
+@pytest.mark.parametrize("numberOfWorkers", [1, 2])
+def testAdaptiveRunReachesPrecision(sampler, tmp_path, numberOfWorkers):
+    """
+    An adaptive run stops as soon as the target precision is reached, with the same families as a run with a fixed
+    number of families and the same seed.
+    """
+    targetPrecision = 0.05
+    result, monitor = runAdaptive(sampler(61), maxGeneration, aimList, targetPrecision, 20000, batchSize=100,
+                                  numberOfWorkers=numberOfWorkers)
+    assert monitor.stopReason == "precision"
+    assert monitor.precision() <= targetPrecision
+    assert monitor.numberOfFamilies < 20000
+    fixed = runFamilies(sampler(61), monitor.numberOfFamilies, maxGeneration, aimList, 1)
+    assert vars(result) == vars(fixed)
+
+    path = str(tmp_path / "precision.json")
+    writePrecision(path, monitor, targetPrecision)
+    with open(path) as file:
+        summary = json.load(file)
+    assert summary["stopReason"] == "precision"
+    assert summary["numberOfFamilies"] == monitor.numberOfFamilies
+    assert summary["precision"] <= targetPrecision
@@ -0,0 +1,28 @@
+import numpy as np
+
+from analytic import GeneratingFunctionModel
+from runner import runFamilies
+
+aimList = [5, 3, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1]
+numberOfFamilies = 4000
+maxGeneration = 8
+
+
+def testModelAgreesWithCountsEngine(sampler):
+    """
+    The generating functions give the distribution of the generation of dying out and the expected number of adult
+    males of the simulation, within four standard errors of the simulated values.
+    """
+    familySampler = sampler(51)
+    result = runFamilies(familySampler, numberOfFamilies, maxGeneration, aimList, 1, engine="counts")
+    model = GeneratingFunctionModel(familySampler)
+
+    probabilities = model.extinctGenerationDistribution(maxGeneration)
+    shares = np.bincount(result.extinctGenerationList, minlength=maxGeneration + 1) / numberOfFamilies
+    standardError = np.sqrt(probabilities * (1 - probabilities) / numberOfFamilies)
+    assert (np.abs(shares - probabilities) <= 4 * standardError + 1e-3).all()
+    assert shares.sum() > 0.1
+
+    adultMales = np.array(result.maleAduldNumberPerGenerationListList)
+    standardError = adultMales.std(axis=0) / np.sqrt(numberOfFamilies)
+    assert (np.abs(adultMales.mean(axis=0) - model.meanAdultMales(maxGeneration)) <= 4 * standardError + 1e-9).all()
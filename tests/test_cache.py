@@ -0,0 +1,48 @@
+import os
+
+from cache import PedigreeCache, analyseEnsemble
+from family import SimulationResult
+from runner import runFamilies
+
+aimLists = [[5, 3, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1], [3, 3, 3, 3, 3]]
+
+
+def assertSameLists(cached, direct):
+    assert cached.gen1List == direct.gen1List
+    assert cached.gen2List == direct.gen2List
+    assert cached.extinctGenerationList == direct.extinctGenerationList
+    assert cached.maleAduldNumberPerGenerationListList == direct.maleAduldNumberPerGenerationListList
+
+
+def testCachedEnsembleMatchesDirectSimulation(sampler, tmp_path):
+    """
+    The analysis of the saved families gives the same lists as the simulation without cache, also for fewer
+    families and generations than saved and for several aimLists at once.
+    """
+    cache = PedigreeCache(str(tmp_path), 10 ** 9)
+    ensemble = cache.ensemble(sampler(71), 60, 9, 2)
+    for numberOfFamilies, maxGeneration in [(60, 9), (35, 7)]:
+        results = analyseEnsemble(ensemble, aimLists, [SimulationResult() for aimList in aimLists],
+                                  numberOfFamilies, maxGeneration, 2)
+        for aimList, cached in zip(aimLists, results):
+            direct = runFamilies(sampler(71), numberOfFamilies, maxGeneration, aimList, 1)
+            assertSameLists(cached, direct)
+            assert direct.gen2List
+    # a smaller ensemble is read from the cache, not simulated again
+    assert cache.ensemble(sampler(71), 40, 8).directory == ensemble.directory
+
+
+def testEvictionKeepsNewestEnsemble(sampler, tmp_path):
+    """
+    The ensembles not used for the longest time are deleted as soon as the cache is larger than maxBytes.
+    """
+    cache = PedigreeCache(str(tmp_path), 10 ** 9)
+    first = cache.ensemble(sampler(72), 40, 7, 1)
+    second = cache.ensemble(sampler(73), 40, 7, 1)
+    assert len(cache.entries()) == 2
+    # the first ensemble is used again, so the second one is the oldest
+    cache.ensemble(sampler(72), 40, 7, 1)
+    cache.maxBytes = max(entry[2] for entry in cache.entries())
+    cache.evict()
+    assert [entry[0] for entry in cache.entries()] == [first.directory]
+    assert not os.path.exists(second.directory)
@@ -0,0 +1,25 @@
+import numpy as np
+from scipy.stats import ks_2samp
+
+from runner import runFamilies
+
+aimList = [5, 3, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1]
+numberOfFamilies = 1500
+
+
+def testCountsEngineHasSameDistribution(sampler):
+    """
+    The simulation on numbers of persons per branch gives the same distributions as the simulation of individual
+    persons (other random numbers, so only compared statistically, with fixed seeds).
+    """
+    individual = runFamilies(sampler(21), numberOfFamilies, 8, aimList, 1, engine="individual")
+    counts = runFamilies(sampler(22), numberOfFamilies, 8, aimList, 1, engine="counts")
+    for name in ["gen1List", "gen2List", "extinctGenerationList"]:
+        assert ks_2samp(getattr(individual, name), getattr(counts, name)).pvalue > 0.01
+    for name in ["numberPerGenerationListList", "maleAduldNumberPerGenerationListList"]:
+        individualValues = np.array(getattr(individual, name))
+        countsValues = np.array(getattr(counts, name))
+        # difference of the averages per generation within four standard errors
+        standardError = np.sqrt((individualValues.var(axis=0) + countsValues.var(axis=0)) / numberOfFamilies)
+        difference = np.abs(individualValues.mean(axis=0) - countsValues.mean(axis=0))
+        assert (difference <= 4 * standardError + 1e-9).all()
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from runner import simulateFamilies
+
+numberOfFamilies = 3000
+
+
+@pytest.mark.parametrize("engine", ["individual", "counts"])
+def testExtinctionsWithoutStatistics(sampler, engine):
+    """
+    Without statistics the families are still followed after the outcome is decided, so families dying out after
+    reaching the target are counted and the number of extinct families agrees with the full simulation.
+    """
+    familySampler = sampler(31, loc=1, scale=3)
+    full = simulateFamilies(familySampler, 0, numberOfFamilies, 14, [1, 1], True, engine)
+    fast = simulateFamilies(familySampler, 0, numberOfFamilies, 14, [1, 1], False, engine)
+    # the random numbers are the same until the outcome is decided
+    assert [familyResult.gen2 for familyResult in full] == [familyResult.gen2 for familyResult in fast]
+    assert any(familyResult.gen2 != "" and familyResult.extinctGeneration != "" for familyResult in fast)
+    fullExtinct = np.array([familyResult.extinctGeneration != "" for familyResult in full])
+    fastExtinct = np.array([familyResult.extinctGeneration != "" for familyResult in fast])
+    standardError = np.sqrt(2 * fullExtinct.var() / numberOfFamilies)
+    assert abs(fullExtinct.mean() - fastExtinct.mean()) <= 4 * standardError + 1 / numberOfFamilies
+
+
+@pytest.mark.parametrize("engine", ["individual", "counts", "reference"])
+@pytest.mark.parametrize("aimList", [[3], [0, 0], [2, 0]])
+def testAimListWithoutTwoLocations(sampler, engine, aimList):
+    """
+    All engines reject an aimList with less than two locations in the same way.
+    """
+    with pytest.raises(ValueError, match="at least two locations"):
+        simulateFamilies(sampler(32), 0, 1, 6, aimList, True, engine)
@@ -0,0 +1,38 @@
+import pytest
+
+from family import analyseFamily, analyseFamilyTargets
+from pedigree import generatePedigree
+from reference import analyseReference, personListOfPedigree
+
+maxGeneration = 9
+
+
+@pytest.mark.parametrize("aimList", [[5, 3, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1],
+                                     [10, 6, 6, 6, 4, 4, 4, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2]])
+def testAnalyseFamilyMatchesReference(sampler, aimList):
+    """
+    The analysis of a pedigree gives the same outcome as the original algorithm for the same persons.
+    """
+    familySampler = sampler(11)
+    reached = 0
+    for famNum in range(40):
+        pedigree = generatePedigree(maxGeneration, familySampler.forFamily(famNum))
+        expected = analyseReference(*personListOfPedigree(pedigree), maxGeneration, aimList)
+        assert vars(analyseFamily(pedigree, aimList)) == vars(expected)
+        if expected.gen2 != "":
+            reached = reached + 1
+    # the comparison must include families reaching the target
+    assert reached > 0
+
+
+def testAnalyseFamilyTargetsMatchesSingleTargets(sampler):
+    """
+    Several aimLists checked at once give the same outcomes as one check per aimList.
+    """
+    aimLists = [[5, 3, 2, 2, 1], [3, 3, 3, 3, 3], [8, 1, 1], [2, 2, 2]]
+    familySampler = sampler(12)
+    for famNum in range(20):
+        pedigree = generatePedigree(maxGeneration, familySampler.forFamily(famNum))
+        familyResults = analyseFamilyTargets(pedigree, aimLists)
+        for aimList, familyResult in zip(aimLists, familyResults):
+            assert vars(familyResult) == vars(analyseFamily(pedigree, aimList))
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from output import ResultWriter
+from runner import runFamilies
+
+aimList = [5, 3, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1]
+
+
+@pytest.mark.parametrize("engine", ["individual", "counts"])
+def testResultDoesNotDependOnWorkers(sampler, engine):
+    """
+    Every family draws from its own random stream, so the number of processes and the size of the chunks
+    do not change the result for a seed.
+    """
+    single = runFamilies(sampler(3), 60, 8, aimList, 1, engine=engine)
+    parallel = runFamilies(sampler(3), 60, 8, aimList, 3, chunkSize=7, engine=engine)
+    assert vars(single) == vars(parallel)
+    assert single.gen1List
+
+
+def testResultWriterDoesNotDependOnWorkers(sampler, tmp_path):
+    """
+    The statistics folded in the processes are the same as the statistics of one process.
+    """
+    writers = []
+    for numberOfWorkers, chunkSize in [(1, None), (3, 7)]:
+        writer = ResultWriter(str(tmp_path / str(numberOfWorkers)), "B", 8, bufferSize=25)
+        runFamilies(sampler(3), 60, 8, aimList, numberOfWorkers, chunkSize=chunkSize, result=writer)
+        writer.close()
+        writers.append(writer)
+    single, parallel = writers
+    for name in ResultWriter.columns:
+        assert single.column(name).tolist() == parallel.column(name).tolist()
+    for name in ["persons", "adultMales"]:
+        assert getattr(single.statistics, name).count == getattr(parallel.statistics, name).count
+        assert np.allclose(getattr(single.statistics, name).mean, getattr(parallel.statistics, name).mean)
+        assert np.allclose(getattr(single.statistics, name).m2, getattr(parallel.statistics, name).m2)
+    assert (single.statistics.personSketch.counts == parallel.statistics.personSketch.counts).all()
+    assert single.statistics.extinctCounts.tolist() == parallel.statistics.extinctCounts.tolist()
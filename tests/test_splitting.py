@@ -0,0 +1,47 @@
+import numpy as np
+
+from runner import runFamilies
+from splitting import runSplitting, simulateFamiliesSplitting
+
+aimList = [3, 2, 2, 2, 1, 1]
+maxGeneration = 8
+
+
+def testWeightsOfCopiesSumToOne(sampler):
+    """
+    The weights of all copies of a family sum to 1 on average: splitting keeps the sum, the Russian roulette keeps
+    it in expectation.
+    """
+    numberOfFamilies = 2000
+    outcomes = simulateFamiliesSplitting(sampler(93, loc=2, scale=3), 0, numberOfFamilies, maxGeneration, aimList,
+                                         2, 1000)
+    totals = np.array([sum(weight for weight, familyResult in familyOutcomes) for familyOutcomes in outcomes])
+    # some families were removed by the roulette, so the sums vary
+    assert (totals != 1).any()
+    assert abs(totals.mean() - 1) <= 4 * totals.std() / np.sqrt(numberOfFamilies)
+
+
+def testSplittingIsUnbiased(sampler):
+    """
+    The weighted outcomes of the copies estimate the same shares as a simulation without splitting, within four
+    standard errors, so the weights of the splitting and of the Russian roulette are right.
+    """
+    rareSampler = sampler(91, loc=2, scale=3)
+    numberOfFamilies = 12000
+    plain = runFamilies(rareSampler, numberOfFamilies, maxGeneration, aimList, 1, collectStatistics=False,
+                        engine="counts")
+    weighted = runSplitting(sampler(92, loc=2, scale=3), 4000, maxGeneration, aimList, numberOfWorkers=2)
+    # the families were split and the target is rare
+    assert weighted.numberOfTrajectories > 1.5 * weighted.numberOfFamilies
+    plainShare = len(plain.gen2List) / numberOfFamilies
+    assert 0 < plainShare < 0.02
+
+    share, standardError = weighted.reachedShare()
+    plainError = np.sqrt(plainShare * (1 - plainShare) / numberOfFamilies)
+    assert abs(share - plainShare) <= 4 * np.sqrt(standardError ** 2 + plainError ** 2)
+
+    plainShares = np.bincount(plain.extinctGenerationList, minlength=maxGeneration + 1) / numberOfFamilies
+    plainErrors = np.sqrt(plainShares * (1 - plainShares) / numberOfFamilies)
+    standardErrors = weighted.standardError("extinctGeneration")
+    difference = np.abs(weighted.histogram("extinctGeneration") - plainShares)
+    assert (difference <= 4 * np.sqrt(standardErrors ** 2 + plainErrors ** 2) + 1e-3).all()
@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+from conftest import demographicParameters
+from sweep import runSweep, scenarioGrid
+
+
+def readFiles(directory):
+    """
+    :return: content per CSV file of a directory (dictionary)
+    """
+    content = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name)) as file:
+            content[name] = file.read()
+    return content
+
+
+@pytest.mark.parametrize("numberOfWorkers", [1, 2])
+def testResumedSweepWritesSameFiles(tmp_path, numberOfWorkers):
+    """
+    A sweep that is restarted after chunks were lost only simulates these chunks again and writes the same files.
+    """
+    baseParameters = dict(demographicParameters, seed=41, numberOfSimulatedFamilies=50, maxGeneration=7,
+                          aimList=[3, 2, 1, 1])
+    scenarios = scenarioGrid(baseParameters, {"loc": [3, 4]}, "S")
+    checkpointDirectory = str(tmp_path / "checkpoints")
+    runSweep(scenarios, checkpointDirectory, str(tmp_path / "complete"), numberOfWorkers, chunkSize=10)
+    complete = readFiles(str(tmp_path / "complete"))
+    assert len(complete) == 8
+
+    # chunks of both scenarios are lost, as after an interruption
+    scenarioDirectories = sorted(os.listdir(checkpointDirectory))
+    os.remove(os.path.join(checkpointDirectory, scenarioDirectories[0], "chunk-10-20.json"))
+    os.remove(os.path.join(checkpointDirectory, scenarioDirectories[1], "chunk-40-50.json"))
+    runSweep(scenarios, checkpointDirectory, str(tmp_path / "resumed"), numberOfWorkers, chunkSize=10)
+    assert readFiles(str(tmp_path / "resumed")) == complete